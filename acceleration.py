@@ -0,0 +1,446 @@
+"""
+Convergence Acceleration for Gene Drive Trajectories
+
+Near a stable fixed point the recurrence contracts linearly: every generation
+shrinks the step by roughly the same ratio r along the slowest eigendirection.
+When r is close to 1, plain iteration spends most of its generations there. Two
+accelerators cut that short once the regime is detected:
+
+- "aitken": vector Aitken extrapolation. Once successive steps stay aligned and
+  shrink by a steady ratio, jump straight to the estimated limit q + d*r/(1-r).
+- "anderson": Anderson mixing over the last ANDERSON_DEPTH steps. Once the
+  residual shrinks by a steady ratio, every generation replaces the plain
+  iterate by the combination of recent iterates whose residuals best cancel,
+  for as long as the residual keeps shrinking. Steps need not be aligned, so it
+  also handles trajectories that spiral in along complex eigenvalues; in two
+  dimensions depth 2 is a multisecant (quasi-Newton) step. Mixing converges to
+  unstable fixed points as readily as to stable ones, so a mixed point is only
+  used where the Jacobian of step_gene_drive contracts in every direction.
+
+Either method only jumps to a target where the Jacobian of step_gene_drive
+contracts: a small residual alone can also mark a slow, non-attracting region,
+and a trajectory sent there need not settle at all.
+
+A jump is only a proposal: the next generation measures the residual
+|step_gene_drive(q) - q| at the proposed point, and if that is no better than
+the residual before the jump the trajectory falls back to the plain iterate.
+After max_rejections such fallbacks a run stops extrapolating and finishes by
+plain iteration. Runs therefore still stop on the usual convergence test, i.e.
+at a true fixed point.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+from gene_drive import DriveCoefficients, jacobian_with_coefficients
+
+ACCELERATION_METHODS = ("aitken", "anderson")
+ANDERSON_DEPTH = 2  # residual differences per mixing step; more are rank-deficient in two dimensions
+
+
+def aitken_factor(d1_prev, d2_prev, d1, d2):
+    """
+    Factor k such that q + k*d estimates the limit of a linearly contracting sequence.
+
+    Parameters:
+    - d1_prev, d2_prev: previous step in deme 1 and deme 2
+    - d1, d2: latest step in deme 1 and deme 2 (q is the point this step led to)
+
+    Returns:
+    - the extrapolation factor (float or array, like the inputs)
+    """
+    # Contraction ratio along the step direction; the remaining steps sum to r/(1-r)
+    r = (d1 * d1_prev + d2 * d2_prev) / (d1_prev * d1_prev + d2_prev * d2_prev)
+    return r / (1 - r)
+
+
+def anderson_mix(x1, x2, f1, f2):
+    """
+    Anderson mixing step from the last ANDERSON_DEPTH + 1 iterates.
+
+    With residuals f_k = step_gene_drive(x_k) - x_k, finds the weights gamma that
+    minimize |f_k - dF gamma| over the residual differences dF and returns
+    x_k + f_k - (dX + dF) gamma. Mixing solves F(q) = q for any root, stable or
+    not, so depth 2 is only used where the secant estimate of the Jacobian,
+    dG dX^-1, contracts in every direction. Where the differences are (nearly)
+    collinear the step is depth 1 along the newest difference, i.e. Aitken's.
+
+    Parameters:
+    - x1, x2: iterates in deme 1 and deme 2, oldest first along axis 0; NaN
+      where a lane has fewer iterates
+    - f1, f2: residuals at those iterates
+
+    Returns:
+    - the mixed point in deme 1 and deme 2; NaN where it cannot be formed or the
+      iterates are not contracting
+    """
+    x1, x2, f1, f2 = (np.asarray(a, dtype=np.float64) for a in (x1, x2, f1, f2))
+    g1, g2 = x1 + f1, x2 + f2  # step_gene_drive at the iterates
+    # Newest difference u, the one before it v
+    u1, u2 = f1[-1] - f1[-2], f2[-1] - f2[-2]
+    v1, v2 = f1[-2] - f1[-3], f2[-2] - f2[-3]
+    gu1, gu2 = g1[-1] - g1[-2], g2[-1] - g2[-2]
+    gv1, gv2 = g1[-2] - g1[-3], g2[-2] - g2[-3]
+    xu1, xu2 = x1[-1] - x1[-2], x2[-1] - x2[-2]
+    xv1, xv2 = x1[-2] - x1[-3], x2[-2] - x2[-3]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        uu = u1 * u1 + u2 * u2
+        det = u1 * v2 - v1 * u2
+        scale = 1e-8 * np.sqrt(uu * (v1 * v1 + v2 * v2))
+        collinear = np.abs(det) <= scale
+        full = np.abs(det) > scale
+        # Secant Jacobian J = dG dX^-1: eigenvalues from its trace and determinant
+        det_x = xu1 * xv2 - xv1 * xu2
+        trace = (gu1 * xv2 - gv1 * xu2 + gv2 * xu1 - gu2 * xv1) / det_x
+        det_j = (gu1 * gv2 - gv1 * gu2) / det_x
+        full &= _spectral_radius(trace, det_j) < 1
+        # Depth 2: dF gamma = f_k is square; depth 1: projection onto u
+        gamma_u = np.where(full, (f1[-1] * v2 - f2[-1] * v1) / det,
+                           (u1 * f1[-1] + u2 * f2[-1]) / uu)
+        gamma_v = np.where(full, (u1 * f2[-1] - u2 * f1[-1]) / det, 0.0)
+        gamma_u = np.where(full | collinear, gamma_u, np.nan)
+        gv1, gv2 = np.where(full, gv1, 0.0), np.where(full, gv2, 0.0)
+        return (g1[-1] - gamma_u * gu1 - gamma_v * gv1,
+                g2[-1] - gamma_u * gu2 - gamma_v * gv2)
+
+
+def _spectral_radius(trace, det):
+    """Largest eigenvalue modulus of 2x2 matrices given their trace and determinant."""
+    disc = trace * trace / 4 - det
+    root = np.sqrt(np.abs(disc))
+    return np.where(disc >= 0, np.abs(trace) / 2 + root, np.sqrt(np.abs(det)))
+
+
+def _spectral_radius_scalar(trace: float, det: float) -> float:
+    """_spectral_radius on Python floats."""
+    disc = trace * trace / 4 - det
+    return abs(trace) / 2 + math.sqrt(disc) if disc >= 0 else math.sqrt(abs(det))
+
+
+def _contracting(coef: DriveCoefficients, q1, q2):
+    """Whether step_gene_drive contracts in every direction at q (Jacobian spectral radius below 1)."""
+    j11, j12, j21, j22 = jacobian_with_coefficients(q1, q2, coef)
+    with np.errstate(invalid="ignore"):
+        return _spectral_radius(j11 + j22, j11 * j22 - j12 * j21) < 1
+
+
+def _contracting_scalar(coef: DriveCoefficients, q1: float, q2: float) -> bool:
+    """_contracting on Python floats."""
+    j11, j12, j21, j22 = jacobian_with_coefficients(q1, q2, coef)
+    return _spectral_radius_scalar(j11 + j22, j11 * j22 - j12 * j21) < 1
+
+
+def check_method(method: Optional[str]) -> None:
+    """Raise ValueError unless method is None or a supported acceleration method."""
+    if method is not None and method not in ACCELERATION_METHODS:
+        raise ValueError(f"unknown acceleration method {method!r}, expected one of {ACCELERATION_METHODS}")
+
+
+def _predicted_generations(ratio, step, convergence_threshold):
+    """Generations plain iteration needs to shrink a step below the threshold at this ratio."""
+    if step <= convergence_threshold or not 0 < abs(ratio) < 1:
+        return 0
+    return math.ceil(math.log(convergence_threshold / step) / math.log(abs(ratio)))
+
+
+class TrajectoryAccelerator:
+    """
+    Extrapolation state for a single run of the scalar engine.
+
+    Call propose() once per generation with the plain iterate; it returns the point
+    to continue from, which is either the plain iterate, an extrapolated point, or
+    the plain iterate from before a rejected extrapolation. After max_rejections
+    rejected extrapolations it only returns plain iterates.
+    """
+
+    def __init__(self, method: str, coef: DriveCoefficients, convergence_threshold: float,
+                 max_generations: int, window: int = 3, ratio_tol: float = 1e-3,
+                 max_rejections: int = 8):
+        check_method(method)
+        self.method = method
+        self.coef = DriveCoefficients(*(float(a) for a in coef))  # plain floats for the scalar path
+        self.convergence_threshold = convergence_threshold
+        self.max_generations = max_generations
+        self.window = window
+        self.ratio_tol = ratio_tol
+        self.max_rejections = max_rejections
+        self.extrapolations = 0
+        self.rejected = 0
+        self.predicted_generations: Optional[int] = None
+        self._d_prev = (0.0, 0.0)
+        self._ratio_prev: Optional[float] = None
+        self._streak = 0
+        self._backup = None
+        self._iterates: Deque[Tuple[float, float, float, float]] = deque(maxlen=ANDERSON_DEPTH + 1)
+        self._step_prev: Optional[float] = None
+
+    def propose(self, generation: int, q1: float, q2: float, q1_next: float, q2_next: float):
+        """Return the point to continue from after the plain step q -> q_next."""
+        d1, d2 = q1_next - q1, q2_next - q2
+        step = max(abs(d1), abs(d2))
+
+        if self._backup is not None:
+            # q was an extrapolated point: keep it only if its residual improved
+            backup_q1, backup_q2, backup_step = self._backup
+            self._backup = None
+            if step < backup_step:
+                self.extrapolations += 1
+                self._d_prev = (d1, d2)
+            else:
+                self.rejected += 1
+                self._d_prev = (0.0, 0.0)
+                self._iterates.clear()
+                self._step_prev, self._ratio_prev, self._streak = None, None, 0
+                return backup_q1, backup_q2
+            if self.method == "aitken":
+                return q1_next, q2_next
+        if self.rejected >= self.max_rejections:
+            return q1_next, q2_next
+
+        if self.method == "anderson":
+            return self._anderson(generation, q1, q2, q1_next, q2_next, d1, d2, step)
+
+        d1_prev, d2_prev = self._d_prev
+        self._d_prev = (d1, d2)
+        norm_prev = d1_prev * d1_prev + d2_prev * d2_prev
+        if norm_prev == 0:
+            self._ratio_prev, self._streak = None, 0
+            return q1_next, q2_next
+
+        # Linear regime: successive steps stay aligned and shrink by a steady ratio
+        dot = d1 * d1_prev + d2 * d2_prev
+        ratio = dot / norm_prev
+        aligned = dot * dot >= (1 - 1e-6) * (d1 * d1 + d2 * d2) * norm_prev
+        if (aligned and abs(ratio) < 1 and self._ratio_prev is not None
+                and abs(ratio - self._ratio_prev) < self.ratio_tol):
+            self._streak += 1
+        else:
+            self._streak = 0
+        self._ratio_prev = ratio
+        if self._streak < self.window:
+            return q1_next, q2_next
+
+        factor = aitken_factor(d1_prev, d2_prev, d1, d2)
+        target1, target2 = q1_next + factor * d1, q2_next + factor * d2
+        if not (0.0 <= target1 <= 1.0 and 0.0 <= target2 <= 1.0
+                and _contracting_scalar(self.coef, target1, target2)):
+            return q1_next, q2_next
+        point = self._jump(generation, ratio, step, q1_next, q2_next, target1, target2)
+        if self._backup is not None:
+            self._ratio_prev, self._streak = None, 0
+        return point
+
+    def _anderson(self, generation, q1, q2, q1_next, q2_next, d1, d2, step):
+        # Contracting regime: the residual shrinks by a steady ratio for window
+        # generations; from then on mixing continues while the residual shrinks
+        # and no proposal is rejected
+        ratio = step / self._step_prev if self._step_prev else None
+        shrinking = ratio is not None and ratio < 1
+        if self._streak < self.window:
+            steady = (shrinking and self._ratio_prev is not None
+                      and abs(ratio - self._ratio_prev) < self.ratio_tol)
+            self._streak = self._streak + 1 if steady else 0
+        elif not shrinking:
+            self._streak = 0
+        self._ratio_prev = ratio
+        self._step_prev = step
+        self._iterates.append((q1, q2, d1, d2))
+        if self._streak < self.window or len(self._iterates) < 2:
+            return q1_next, q2_next
+
+        if len(self._iterates) <= ANDERSON_DEPTH:
+            return q1_next, q2_next
+        target = self._mix()
+        if target is None:
+            return q1_next, q2_next
+        return self._jump(generation, ratio, step, q1_next, q2_next, *target)
+
+    def _mix(self) -> Optional[Tuple[float, float]]:
+        """anderson_mix and the contraction check of the target on Python floats."""
+        (xa1, xa2, fa1, fa2), (xb1, xb2, fb1, fb2), (xc1, xc2, fc1, fc2) = self._iterates
+        u1, u2 = fc1 - fb1, fc2 - fb2
+        v1, v2 = fb1 - fa1, fb2 - fa2
+        xu1, xu2 = xc1 - xb1, xc2 - xb2
+        xv1, xv2 = xb1 - xa1, xb2 - xa2
+        gu1, gu2 = xu1 + u1, xu2 + u2
+        gv1, gv2 = xv1 + v1, xv2 + v2
+        uu = u1 * u1 + u2 * u2
+        det = u1 * v2 - v1 * u2
+        det_x = xu1 * xv2 - xv1 * xu2
+        if abs(det) > 1e-8 * math.sqrt(uu * (v1 * v1 + v2 * v2)):
+            if det_x == 0:
+                return None
+            trace = (gu1 * xv2 - gv1 * xu2 + gv2 * xu1 - gu2 * xv1) / det_x
+            if _spectral_radius_scalar(trace, (gu1 * gv2 - gv1 * gu2) / det_x) >= 1:
+                return None
+            gamma_u = (fc1 * v2 - fc2 * v1) / det
+            gamma_v = (u1 * fc2 - u2 * fc1) / det
+        elif uu > 0:
+            gamma_u, gamma_v = (u1 * fc1 + u2 * fc2) / uu, 0.0
+        else:
+            return None
+        target1 = xc1 + fc1 - gamma_u * gu1 - gamma_v * gv1
+        target2 = xc2 + fc2 - gamma_u * gu2 - gamma_v * gv2
+        # Mixing finds unstable fixed points as readily as stable ones
+        if not _contracting_scalar(self.coef, target1, target2):
+            return None
+        return target1, target2
+
+    def _jump(self, generation, ratio, step, q1_next, q2_next, target1, target2):
+        if not (0.0 <= target1 <= 1.0 and 0.0 <= target2 <= 1.0):
+            # Overshooting the unit square (or no estimate) means the model does not hold
+            return q1_next, q2_next
+        if self.predicted_generations is None:
+            self.predicted_generations = min(self.max_generations, generation + 1 + _predicted_generations(
+                ratio, step, self.convergence_threshold))
+        self._backup = (q1_next, q2_next, step)
+        return target1, target2
+
+    def generations_saved(self, generations: int) -> int:
+        """Estimated generations saved, from the contraction rate at the first extrapolation."""
+        if self.predicted_generations is None:
+            return 0
+        return max(0, self.predicted_generations - generations)
+
+
+class BatchTrajectoryAccelerator:
+    """
+    Extrapolation state for every run of the batch engine, one lane per run.
+
+    Lanes follow the same rules as TrajectoryAccelerator. The engine calls propose()
+    on the runs still moving and compress() whenever it drops converged runs.
+    """
+
+    def __init__(self, method: str, coef: DriveCoefficients, convergence_threshold: float,
+                 max_generations: int, window: int = 3, ratio_tol: float = 1e-3,
+                 max_rejections: int = 8):
+        check_method(method)
+        size = coef.a11.size
+        self.method = method
+        self.coef = coef
+        self.convergence_threshold = convergence_threshold
+        self.max_generations = max_generations
+        self.window = window
+        self.ratio_tol = ratio_tol
+        self.max_rejections = max_rejections
+        self.predicted_generations = np.full(size, -1, dtype=np.int64)
+        self.extrapolations = np.zeros(size, dtype=np.int64)
+        self.rejected = np.zeros(size, dtype=np.int64)
+        self._d1_prev = np.zeros(size)
+        self._d2_prev = np.zeros(size)
+        self._ratio_prev = np.full(size, np.nan)
+        self._streak = np.zeros(size, dtype=np.int64)
+        self._backup_q1 = np.zeros(size)
+        self._backup_q2 = np.zeros(size)
+        self._backup_step = np.full(size, np.nan)
+        # Anderson history, oldest first along axis 0, NaN until a lane has iterates
+        self._x1, self._x2, self._f1, self._f2 = (np.full((ANDERSON_DEPTH + 1, size), np.nan)
+                                                  for _ in range(4))
+        self._step_prev = np.full(size, np.nan)
+
+    def compress(self, keep: np.ndarray) -> None:
+        """Keep only the lanes selected by a mask, in the same order as the engine."""
+        for name in ("_d1_prev", "_d2_prev", "_ratio_prev", "_streak",
+                     "_backup_q1", "_backup_q2", "_backup_step",
+                     "_x1", "_x2", "_f1", "_f2", "_step_prev"):
+            setattr(self, name, getattr(self, name)[..., keep])
+        self.coef = self.coef.compress(keep)
+
+    def propose(self, generation: int, active: np.ndarray, q1: np.ndarray, q2: np.ndarray,
+                q1_next: np.ndarray, q2_next: np.ndarray):
+        """Return the points to continue from after the plain steps q -> q_next."""
+        d1, d2 = q1_next - q1, q2_next - q2
+        step = np.maximum(np.abs(d1), np.abs(d2))
+
+        # Lanes sitting on an extrapolated point: keep it only if the residual improved
+        checked = ~np.isnan(self._backup_step)
+        improved = checked & (step < self._backup_step)
+        worse = checked & ~improved
+        self.extrapolations[active[improved]] += 1
+        self.rejected[active[worse]] += 1
+        q1_next = np.where(worse, self._backup_q1, q1_next)
+        q2_next = np.where(worse, self._backup_q2, q2_next)
+        self._backup_step = np.full(step.shape, np.nan)
+        if self.method == "anderson":
+            return self._anderson(generation, active, q1, q2, q1_next, q2_next, d1, d2, step, worse)
+
+        # Linear regime: successive steps stay aligned and shrink by a steady ratio
+        d1_prev, d2_prev = self._d1_prev, self._d2_prev
+        norm_prev = d1_prev**2 + d2_prev**2
+        dot = d1 * d1_prev + d2 * d2_prev
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(norm_prev > 0, dot / norm_prev, np.nan)
+            aligned = dot * dot >= (1 - 1e-6) * (d1 * d1 + d2 * d2) * norm_prev
+            steady = (~checked & (norm_prev > 0) & aligned & (np.abs(ratio) < 1)
+                      & (np.abs(ratio - self._ratio_prev) < self.ratio_tol))
+        self._streak = np.where(steady, self._streak + 1, 0)
+        self._ratio_prev = np.where(checked, np.nan, ratio)
+        self._d1_prev = np.where(worse, 0.0, d1)
+        self._d2_prev = np.where(worse, 0.0, d2)
+
+        jump = self._streak >= self.window
+        if not jump.any():
+            return q1_next, q2_next
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = aitken_factor(d1_prev, d2_prev, d1, d2)
+            target1 = q1_next + factor * d1
+            target2 = q2_next + factor * d2
+        jump &= _contracting(self.coef, target1, target2)
+        jump = self._jump(generation, active, jump, ratio, step, q1_next, q2_next, target1, target2)
+        self._streak[jump] = 0
+        self._ratio_prev[jump] = np.nan
+        return np.where(jump, target1, q1_next), np.where(jump, target2, q2_next)
+
+    def _anderson(self, generation, active, q1, q2, q1_next, q2_next, d1, d2, step, worse):
+        # Contracting regime: the residual shrinks by a steady ratio for window
+        # generations; from then on mixing continues while the residual shrinks
+        # and no proposal is rejected
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = step / self._step_prev
+            shrinking = ratio < 1
+            steady = shrinking & (np.abs(ratio - self._ratio_prev) < self.ratio_tol)
+        engaged = self._streak >= self.window
+        self._streak = np.where(worse, 0, np.where(engaged, np.where(shrinking, self._streak, 0),
+                                                   np.where(steady, self._streak + 1, 0)))
+        self._ratio_prev = np.where(worse, np.nan, ratio)
+        self._step_prev = np.where(worse, np.nan, step)
+        for iterates, latest in ((self._x1, q1), (self._x2, q2), (self._f1, d1), (self._f2, d2)):
+            iterates[:-1] = iterates[1:].copy()
+            iterates[-1] = latest
+            iterates[:, worse] = np.nan  # lanes falling back start over
+
+        jump = self._streak >= self.window
+        if not jump.any():
+            return q1_next, q2_next
+
+        target1, target2 = anderson_mix(self._x1, self._x2, self._f1, self._f2)
+        # Mixing finds unstable fixed points as readily as stable ones
+        jump &= _contracting(self.coef, target1, target2)
+        jump = self._jump(generation, active, jump, ratio, step, q1_next, q2_next, target1, target2)
+        return np.where(jump, target1, q1_next), np.where(jump, target2, q2_next)
+
+    def _jump(self, generation, active, jump, ratio, step, q1_next, q2_next, target1, target2):
+        """Lanes that jump to their targets; records their backups and first predictions."""
+        with np.errstate(invalid="ignore"):
+            # Overshooting the unit square (or no estimate) means the model does not hold
+            jump = jump & (target1 >= 0) & (target1 <= 1) & (target2 >= 0) & (target2 <= 1)
+        jump &= self.rejected[active] < self.max_rejections
+        lanes = active[jump]
+        first = self.predicted_generations[lanes] < 0
+        for lane, r, st in zip(lanes[first], ratio[jump][first], step[jump][first]):
+            self.predicted_generations[lane] = min(
+                self.max_generations, generation + 1 + _predicted_generations(r, st, self.convergence_threshold))
+
+        self._backup_q1 = np.where(jump, q1_next, self._backup_q1)
+        self._backup_q2 = np.where(jump, q2_next, self._backup_q2)
+        self._backup_step = np.where(jump, step, np.nan)
+        return jump
+
+    def generations_saved(self, generations: np.ndarray) -> np.ndarray:
+        """Estimated generations saved per run, from the contraction rate at its first extrapolation."""
+        return np.where(self.predicted_generations >= 0,
+                        np.maximum(0, self.predicted_generations - generations), 0)
@@ -0,0 +1,247 @@
+"""
+Basins of Attraction
+
+Maps which equilibrium every initial condition on a grid of (q1, q2) release
+frequencies ends up at, for one parameter set. All cells are iterated together
+through the batched kernel step; a cell leaves the working set as soon as it is
+captured by a stable fixed point, so late generations only cost as much as the
+cells still undecided.
+
+Stable fixed points come from equilibria.fixed_points, and a cell counts as
+captured once it is inside a small box around one of them. The box is sized well
+below the distance to every other fixed point, where the linearization holds and
+the trajectory can no longer leave.
+
+When only the boundary matters, trace_separatrix() finds it by bisecting along
+rays from a point inside one basin, all rays in one batch, for a fraction of the
+cost of a dense grid.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from equilibria import fixed_points
+from gene_drive import (OUTCOME_DTE, OUTCOME_FIXATION, classify_outcome, gene_drive_coefficients,
+                        step_with_coefficients)
+
+# Label of cells that did not settle on a stable fixed point
+UNRESOLVED = 255
+
+
+class BasinMap(NamedTuple):
+    """
+    Basin labels on a grid of initial conditions.
+
+    labels[i, j] is the index into attractors of the equilibrium reached from
+    (q1_values[j], q2_values[i]), or UNRESOLVED.
+    """
+    labels: np.ndarray  # (len(q2_values), len(q1_values)) uint8, possibly a memmap
+    attractors: np.ndarray  # (K, 2) stable fixed points as (q1, q2)
+    outcomes: np.ndarray  # OUTCOME_* code of each attractor
+    q1_values: np.ndarray
+    q2_values: np.ndarray
+
+
+class Separatrix(NamedTuple):
+    """
+    Boundary of one basin, found along rays from a reference point.
+
+    points[k] is where the ray at angles[k] first leaves the basin, NaN when the ray
+    reaches the edge of the unit square without leaving it. Ordered by angle, the
+    rows form a polyline around the reference point.
+    """
+    points: np.ndarray  # (n_rays, 2) boundary points as (q1, q2)
+    angles: np.ndarray
+    reference: np.ndarray  # (q1, q2) the rays start from
+    label: int  # index into attractors of the basin being bounded
+    outside: np.ndarray  # per ray, the label just across the boundary (UNRESOLVED if none)
+    attractors: np.ndarray
+    outcomes: np.ndarray
+
+
+def _capture_radii(attractors: np.ndarray, points: np.ndarray, capture_radius: float) -> np.ndarray:
+    """Per-attractor capture box half-widths, well inside the gap to every other fixed point."""
+    radii = np.full(len(attractors), capture_radius)
+    for k, (a1, a2) in enumerate(attractors):
+        gaps = np.maximum(np.abs(points[:, 0] - a1), np.abs(points[:, 1] - a2))
+        gaps = gaps[gaps > 0]
+        if gaps.size:
+            radii[k] = min(capture_radius, 0.1 * gaps.min())
+    return radii
+
+
+def _label_cells(q1: np.ndarray, q2: np.ndarray, coef, attractors: np.ndarray,
+                 radii: np.ndarray, max_generations: int) -> np.ndarray:
+    """Iterate a flat batch of initial conditions until each is captured; return its labels."""
+    labels = np.full(q1.size, UNRESOLVED, dtype=np.uint8)
+    index = np.arange(q1.size)
+    q1, q2 = q1.copy(), q2.copy()
+
+    for _ in range(max_generations + 1):
+        if index.size == 0:
+            break
+        settled = np.zeros(index.size, dtype=bool)
+        for k, ((a1, a2), radius) in enumerate(zip(attractors, radii)):
+            hit = (np.abs(q1 - a1) < radius) & (np.abs(q2 - a2) < radius)
+            labels[index[hit]] = k
+            settled |= hit
+
+        q1_next, q2_next = step_with_coefficients(q1, q2, coef)
+        # Cells stuck elsewhere, e.g. on the stable manifold of a saddle, stay unresolved
+        settled |= (np.abs(q1_next - q1) < 1e-14) & (np.abs(q2_next - q2) < 1e-14)
+        q1, q2 = q1_next, q2_next
+
+        if settled.any():
+            keep = ~settled
+            index, q1, q2 = index[keep], q1[keep], q2[keep]
+
+    return labels
+
+
+def _label_chunk(start: int, stop: int, q1_values: np.ndarray, q2_values: np.ndarray, coef,
+                 attractors: np.ndarray, radii: np.ndarray, max_generations: int) -> np.ndarray:
+    """Labels of the flat grid cells start:stop; module-level so pool workers can pickle it."""
+    rows, cols = np.divmod(np.arange(start, stop), q1_values.size)
+    return _label_cells(q1_values[cols], q2_values[rows], coef, attractors, radii, max_generations)
+
+
+def _attractors(s: float, c: float, h: float, m: float, alpha: float,
+                capture_radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stable fixed points, their capture radii and their outcome codes."""
+    found = fixed_points(s, c, h, m, alpha)
+    points = np.array([(fp.q1, fp.q2) for fp in found]).reshape(-1, 2)
+    attractors = points[[fp.stability == "stable" for fp in found]].reshape(-1, 2)
+    outcomes = (classify_outcome(attractors[:, 0], attractors[:, 1]) if len(attractors)
+                else np.empty(0, dtype=np.uint8))
+    return attractors, _capture_radii(attractors, points, capture_radius), outcomes
+
+
+def basin_map(s: float, c: float, h: float, m: float, alpha: float,
+              resolution: int = 1000,
+              q1_range: Tuple[float, float] = (0.0, 1.0),
+              q2_range: Tuple[float, float] = (0.0, 1.0),
+              out: Optional[str] = None,
+              max_generations: int = 10000,
+              capture_radius: float = 1e-3,
+              chunk_size: int = 1 << 18,
+              workers: Optional[int] = None) -> BasinMap:
+    """
+    Label every cell of a resolution x resolution grid of initial conditions by its basin.
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters, as in run_gene_drive_model
+    - resolution: number of grid points along each axis
+    - q1_range, q2_range: ranges of initial frequencies, endpoints included
+    - out: optional .npy path; the labels are written there as a uint8 array that
+      can be memory-mapped back with np.load(out, mmap_mode="r")
+    - max_generations: give up on cells not captured after this many generations
+    - capture_radius: largest capture box half-width around an attractor
+    - chunk_size: number of cells iterated together, bounding temporary memory
+    - workers: number of worker processes labelling chunks (None or 1 runs in-process)
+
+    Returns:
+    - BasinMap with the labels and the attractors they refer to
+    """
+    attractors, radii, outcomes = _attractors(s, c, h, m, alpha, capture_radius)
+    coef = gene_drive_coefficients(s, c, h, m, alpha)
+
+    q1_values = np.linspace(q1_range[0], q1_range[1], resolution)
+    q2_values = np.linspace(q2_range[0], q2_range[1], resolution)
+    shape = (resolution, resolution)
+    if out is not None:
+        labels = np.lib.format.open_memmap(out, mode="w+", dtype=np.uint8, shape=shape)
+    else:
+        labels = np.empty(shape, dtype=np.uint8)
+
+    flat = labels.reshape(-1)
+    chunks = [(start, min(start + chunk_size, flat.size)) for start in range(0, flat.size, chunk_size)]
+    settings = (q1_values, q2_values, coef, attractors, radii, max_generations)
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_label_chunk, start, stop, *settings) for start, stop in chunks]
+            for (start, stop), future in zip(chunks, futures):
+                flat[start:stop] = future.result()
+    else:
+        for start, stop in chunks:
+            flat[start:stop] = _label_chunk(start, stop, *settings)
+
+    if out is not None:
+        labels.flush()
+    return BasinMap(labels, attractors, outcomes, q1_values, q2_values)
+
+
+def _ray_lengths(q1: float, q2: float, d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    """Distance from (q1, q2) to the edge of the unit square along each direction."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = np.where(d1 > 0, (1 - q1) / d1, np.where(d1 < 0, -q1 / d1, np.inf))
+        t2 = np.where(d2 > 0, (1 - q2) / d2, np.where(d2 < 0, -q2 / d2, np.inf))
+    return np.minimum(t1, t2)
+
+
+def trace_separatrix(s: float, c: float, h: float, m: float, alpha: float,
+                     reference: Optional[Tuple[float, float]] = None,
+                     n_rays: int = 360,
+                     tol: float = 1e-6,
+                     max_generations: int = 10000,
+                     capture_radius: float = 1e-3) -> Optional[Separatrix]:
+    """
+    Trace the boundary of a basin by bisecting along rays from a point inside it.
+
+    Every bisection round labels the midpoints of all rays in one batch. Each ray
+    keeps the first crossing it brackets; if the basin is not star-shaped around the
+    reference point, parts of the boundary hidden behind it are not seen.
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters, as in run_gene_drive_model
+    - reference: starting point of the rays; by default the DTE attractor, else
+      the fixation attractor, else the first stable fixed point
+    - n_rays: number of rays, evenly spaced in angle
+    - tol: length of the final bracket along each ray
+    - max_generations, capture_radius: as in basin_map
+
+    Returns:
+    - Separatrix of the basin containing the reference point, or None when the
+      reference point does not settle on a stable fixed point
+    """
+    attractors, radii, outcomes = _attractors(s, c, h, m, alpha, capture_radius)
+    if len(attractors) == 0:
+        return None
+    coef = gene_drive_coefficients(s, c, h, m, alpha)
+
+    if reference is None:
+        preferred = [k for code in (OUTCOME_DTE, OUTCOME_FIXATION) for k in np.flatnonzero(outcomes == code)]
+        reference = attractors[preferred[0] if preferred else 0]
+    r1, r2 = (float(v) for v in reference)
+    label = int(_label_cells(np.array([r1]), np.array([r2]), coef, attractors, radii, max_generations)[0])
+    if label == UNRESOLVED:
+        return None
+
+    angles = np.linspace(0.0, 2 * np.pi, n_rays, endpoint=False)
+    d1, d2 = np.cos(angles), np.sin(angles)
+    lo = np.zeros(n_rays)
+    hi = _ray_lengths(r1, r2, d1, d2)
+
+    def labels_at(t):
+        return _label_cells(np.clip(r1 + t * d1, 0.0, 1.0), np.clip(r2 + t * d2, 0.0, 1.0), coef,
+                            attractors, radii, max_generations)
+
+    # Rays that end inside the basin have no crossing to bracket
+    outside = labels_at(hi)
+    crossing = (outside != label) & (hi > 0)
+    longest = hi[crossing].max() if crossing.any() else 0.0
+    rounds = max(0, math.ceil(math.log2(longest / tol))) if longest > tol else 0
+    for _ in range(rounds):
+        mid = 0.5 * (lo + hi)
+        mid_labels = labels_at(mid)
+        inside = mid_labels == label
+        lo = np.where(inside, mid, lo)
+        hi = np.where(inside, hi, mid)
+        outside = np.where(inside, outside, mid_labels)
+
+    t = np.where(crossing, 0.5 * (lo + hi), np.nan)
+    points = np.column_stack([r1 + t * d1, r2 + t * d2])
+    outside = np.where(crossing, outside, UNRESOLVED).astype(np.uint8)
+    return Separatrix(points, angles, np.array([r1, r2]), label, outside, attractors, outcomes)
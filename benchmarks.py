@@ -0,0 +1,288 @@
+"""
+Benchmark Suite
+
+Times the model kernel, the threshold search, the batch engine at several batch
+sizes, a headless run of the mousemod frame loop and the import time of the
+model in a fresh interpreter, which every spawned pool worker pays. Results are
+written as JSON and can be compared against a stored baseline; a benchmark is
+flagged as a regression when its best time grows by more than a configurable
+percentage.
+
+    python benchmarks.py --out bench.json
+    python benchmarks.py --baseline bench.json --threshold 10
+    python benchmarks.py --check
+
+Timings are the best of several repeats, which is the least noisy estimate on a
+shared machine. Only compare results taken on the same machine. --check instead
+runs the consistency checks: fast paths that must agree with the reference
+implementations, on fixed random samples.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from simulation import (find_critical_migration, find_critical_migration_batch, run_gene_drive_model,
+                        run_gene_drive_model_batch)
+
+# Parameter points for the scalar engine: (s, c, h, m, alpha, initial_q1, initial_q2)
+SHORT_RUN = (0.9, 0.3, 0.5, 0.01, 1.0, 0.5, 0.5)  # loss within ~30 generations
+LONG_RUN = (0.5, 0.6, 0.3, 0.02, 1.0, 0.001, 0.01)  # slow loss from a small release, ~250 generations
+NEAR_CRITICAL_RUN = (0.6, 0.72, 1.0, 0.0563, 1.0, 0.7, 0.1)  # just below m*, ~4000 generations
+# Converging run that unchecked Aitken jumps used to push into a slow region where it never settled
+UNSETTLED_RUN = (0.12561380922414633, 0.06527041641129139, 0.2582744000775369, 0.15811093383823338,
+                 0.9921200904061326, 0.10978053695110701, 0.0751972884863652)
+BATCH_SIZES = (100, 10_000, 100_000)
+MOUSEMOD_FRAMES = 60
+
+
+class Benchmark(NamedTuple):
+    """A named timing case; setup() returns the callable that is timed."""
+    name: str
+    setup: Callable[[], Callable[[], None]]
+    units: int = 1  # work items per call, for throughput
+    repeat: int = 5
+
+
+def _batch_setup(size: int) -> Callable[[], Callable[[], None]]:
+    def setup():
+        rng = np.random.default_rng(0)
+        s = rng.uniform(0.3, 0.9, size)
+        m = rng.uniform(0.0, 0.3, size)
+        return lambda: run_gene_drive_model_batch(s, 0.6, 0.3, m, 1.0, 0.7, 0.1)
+    return setup
+
+
+def _mousemod_app():
+    """A headless game on a fixed clock, with the simulation started by a scripted click."""
+    import mousemod
+    app = mousemod.MouseModApp(headless=True, clock=mousemod.FixedClock(), step_delay_ms=0)
+    for event in app.script_events({"click": "run"}):
+        app.handle_event(event)
+    return app
+
+
+def _mousemod_setup() -> Callable[[], None]:
+    """Run the game's full frame loop headless and uncapped."""
+    app = _mousemod_app()
+    return lambda: app.run(max_frames=MOUSEMOD_FRAMES, fps=0)
+
+
+def _mousemod_update_setup() -> Callable[[], None]:
+    app = _mousemod_app()
+
+    def updates():
+        for _ in range(MOUSEMOD_FRAMES):
+            app.update(1000 / 60)
+            if not app.auto_run:
+                # Converged: start over so every call simulates the same kind of frames
+                app.reset()
+                app.auto_run = True
+    return updates
+
+
+def _mousemod_render_setup() -> Callable[[], None]:
+    app = _mousemod_app()
+    app.run(max_frames=30, fps=0)
+    surface = app.screen
+
+    def renders():
+        for _ in range(MOUSEMOD_FRAMES):
+            app.render(surface)
+    return renders
+
+
+def _import_setup(module: Optional[str]) -> Callable[[], Callable[[], None]]:
+    """Start a fresh interpreter that imports a module (or nothing, for the interpreter's own startup)."""
+    code = f"import {module}" if module else "pass"
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def setup():
+        return lambda: subprocess.run([sys.executable, "-c", code], cwd=here, check=True)
+    return setup
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("run/short", lambda: lambda: run_gene_drive_model(*SHORT_RUN, history=None), repeat=50),
+    Benchmark("run/long", lambda: lambda: run_gene_drive_model(*LONG_RUN, history=None), repeat=20),
+    Benchmark("run/near_critical", lambda: lambda: run_gene_drive_model(*NEAR_CRITICAL_RUN, history=None)),
+    Benchmark("run/near_critical_history", lambda: lambda: run_gene_drive_model(*NEAR_CRITICAL_RUN)),
+    Benchmark("mstar/bisect", lambda: lambda: find_critical_migration(0.6, 0.72, 1.0)),
+    Benchmark("mstar/kary8", lambda: lambda: find_critical_migration(0.6, 0.72, 1.0, k=8)),
+    *(Benchmark(f"batch/{size}", _batch_setup(size), units=size, repeat=3) for size in BATCH_SIZES),
+    Benchmark("mousemod/frames", _mousemod_setup, units=MOUSEMOD_FRAMES, repeat=3),
+    Benchmark("mousemod/update", _mousemod_update_setup, units=MOUSEMOD_FRAMES),
+    Benchmark("mousemod/render", _mousemod_render_setup, units=MOUSEMOD_FRAMES, repeat=3),
+    Benchmark("import/python", _import_setup(None)),
+    Benchmark("import/simulation", _import_setup("simulation")),
+    Benchmark("import/plotting", _import_setup("plotting")),
+]
+
+
+def time_benchmark(benchmark: Benchmark, repeat: Optional[int] = None) -> Dict[str, float]:
+    """Best and mean wall time of a benchmark over its repeats, with throughput."""
+    fn = benchmark.setup()
+    fn()  # warm-up: imports, caches, first-touch allocation
+    times = []
+    for _ in range(repeat or benchmark.repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    best = min(times)
+    return {"seconds": best, "mean_seconds": sum(times) / len(times), "repeat": len(times),
+            "units": benchmark.units, "units_per_second": benchmark.units / best}
+
+
+def run_benchmarks(pattern: str = "*", repeat: Optional[int] = None,
+                   report: Optional[Callable[[str, Dict[str, float]], None]] = None) -> Dict:
+    """
+    Run every benchmark whose name matches a glob pattern.
+
+    Parameters:
+    - pattern: fnmatch pattern on benchmark names, e.g. "batch/*"
+    - repeat: override the number of timed repeats of every benchmark
+    - report: called as report(name, result) after each benchmark
+
+    Returns:
+    - dict with "meta" (machine and library versions) and "results" by name
+    """
+    results = {}
+    for benchmark in BENCHMARKS:
+        if not fnmatch(benchmark.name, pattern):
+            continue
+        results[benchmark.name] = time_benchmark(benchmark, repeat)
+        if report is not None:
+            report(benchmark.name, results[benchmark.name])
+    meta = {"python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"meta": meta, "results": results}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = 10.0) -> List[Dict]:
+    """
+    Compare best times against a baseline.
+
+    Parameters:
+    - results, baseline: outputs of run_benchmarks
+    - threshold: slowdown in percent above which a benchmark counts as regressed
+
+    Returns:
+    - one entry per benchmark present in both, with the change in percent and
+      whether it is a regression
+    """
+    rows = []
+    for name, current in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = 100.0 * (current["seconds"] - before["seconds"]) / before["seconds"]
+        rows.append({"benchmark": name, "baseline_seconds": before["seconds"],
+                     "seconds": current["seconds"], "change_percent": change,
+                     "regression": change > threshold})
+    return rows
+
+
+# ---------------- Consistency checks ----------------
+def check_critical_migration_batch(samples: int = 200, seed: int = 2) -> List[str]:
+    """find_critical_migration_batch against find_critical_migration on random configurations."""
+    rng = np.random.default_rng(seed)
+    s, c, h = rng.uniform(0.0, 1.0, (3, samples))
+    alpha = rng.uniform(0.0, 1.0, samples)
+    failures = []
+    batch = find_critical_migration_batch(s, c, h, alpha)
+    for i in range(samples):
+        expected = find_critical_migration(s[i], c[i], h[i], alpha[i])
+        if batch.m_star[i] != expected:
+            failures.append(f"m* for s={s[i]:.4f}, c={c[i]:.4f}, h={h[i]:.4f}, alpha={alpha[i]:.4f}: "
+                            f"batch {batch.m_star[i]!r}, scalar {expected!r}")
+    # DTE that persists to the top of the bracket reports m_max, not 0
+    capped = find_critical_migration_batch(0.6, 0.72, 1.0, 0.1, m_max=0.06)
+    if capped.m_star != 0.06 or capped.valid:
+        failures.append(f"m* with DTE at m_max: {capped}")
+    return failures
+
+
+def check_acceleration(samples: int = 300, seed: int = 3, tol: float = 1e-6) -> List[str]:
+    """Accelerated runs of both engines against plain iteration: same convergence, same endpoint."""
+    rng = np.random.default_rng(seed)
+    s, c, h, alpha, q1, q2 = rng.uniform(0.0, 1.0, (6, samples))
+    m = rng.uniform(0.0, 0.5, samples)
+    points = [np.append(column, value) for column, value in zip((s, c, h, m, alpha, q1, q2), UNSETTLED_RUN)]
+    plain = run_gene_drive_model_batch(*points)
+    failures = []
+    for method in ("aitken", "anderson"):
+        batch = run_gene_drive_model_batch(*points, accelerate=method)
+        for i in np.flatnonzero(plain.converged):
+            point = tuple(float(column[i]) for column in points)
+            stats = {}
+            scalar = run_gene_drive_model(*point, accelerate=method, stats=stats, history=None)
+            for engine, end1, end2, converged in (("batch", batch.q1[i], batch.q2[i], batch.converged[i]),
+                                                  ("scalar", scalar[0], scalar[1], stats["converged"])):
+                if not converged or max(abs(end1 - plain.q1[i]), abs(end2 - plain.q2[i])) > tol:
+                    failures.append(f"{method}/{engine} at {point}: ({end1:.6f}, {end2:.6f}), "
+                                    f"plain ({plain.q1[i]:.6f}, {plain.q2[i]:.6f})")
+    return failures
+
+
+CHECKS: Dict[str, Callable[[], List[str]]] = {
+    "mstar/batch": check_critical_migration_batch,
+    "accelerate": check_acceleration,
+}
+
+
+def run_checks(pattern: str = "*") -> Dict[str, List[str]]:
+    """Run the consistency checks whose name matches a glob pattern; returns the failures of each."""
+    return {name: check() for name, check in CHECKS.items() if fnmatch(name, pattern)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the gene drive engines")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="slowdown in percent flagged as a regression")
+    parser.add_argument("--only", default="*", help="glob pattern on benchmark names")
+    parser.add_argument("--repeat", type=int, default=None, help="override the repeats per benchmark")
+    parser.add_argument("--check", action="store_true", help="run the consistency checks instead of timing")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = run_checks(args.only)
+        for name, messages in failures.items():
+            print(f"{name:<28} {'FAIL' if messages else 'ok'}", file=sys.stderr)
+            for message in messages:
+                print(f"    {message}", file=sys.stderr)
+        return int(any(failures.values()))
+
+    def report(name, result):
+        print(f"{name:<28} {result['seconds'] * 1e3:10.3f} ms  {result['units_per_second']:14,.0f} /s",
+              file=sys.stderr, flush=True)
+
+    results = run_benchmarks(args.only, args.repeat, report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['benchmark']:<28} {row['change_percent']:+8.1f}%  {flag}", file=sys.stderr)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Result Cache for Model Runs
+
+Notebooks and interactive front ends keep asking for the same parameter sets.
+ResultCache memoizes run_gene_drive_model and find_critical_migration, keyed on
+the parameters quantized to a fixed number of decimals plus the convergence
+settings. Runs are computed with the quantized parameters, so a cached result is
+always exactly the result for its key.
+
+Entries live in an in-memory LRU with a size bound and, optionally, in an SQLite
+file that survives restarts. Hit and miss counters are exposed for sizing.
+Every hit returns the same object, so NumPy arrays in cached results (e.g. the
+history of run_gene_drive_model) are made read-only; copy them before modifying.
+"""
+
+import pickle
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from simulation import find_critical_migration, run_gene_drive_model
+
+
+def _freeze(value: Any) -> Any:
+    """Make the arrays in a result read-only, so callers cannot corrupt later hits."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+class ResultCache:
+    """
+    LRU cache in front of the model, with optional on-disk persistence.
+
+    Parameters:
+    - maxsize: maximum number of entries kept in memory
+    - path: optional SQLite file for a persistent second level
+    - decimals: number of decimals parameters are rounded to before keying and running
+    """
+
+    def __init__(self, maxsize: int = 4096, path: Optional[str] = None, decimals: int = 9):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self._db.commit()
+
+    def quantize(self, values: Tuple[float, ...]) -> Tuple[float, ...]:
+        """Round parameters to the cache resolution."""
+        return tuple(round(float(v), self.decimals) for v in values)
+
+    def get_or_compute(self, name: str, params: Tuple[float, ...], settings: Tuple,
+                       compute: Callable[..., Any]) -> Any:
+        """
+        Return the cached result for (name, params, settings), computing it on a miss.
+
+        Parameters:
+        - name: which model function the entry belongs to
+        - params: quantized parameters, passed positionally to compute
+        - settings: convergence settings that also determine the result
+        - compute: function producing the result from params
+
+        Returns:
+        - the result, shared between hits, with its arrays read-only
+        """
+        key = repr((name, params, settings))
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        value = None
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = pickle.loads(row[0])
+                self.hits += 1
+                self.disk_hits += 1
+
+        if value is None:
+            self.misses += 1
+            value = compute(*params)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)",
+                                 (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+                self._db.commit()
+
+        self._memory[key] = _freeze(value)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+        return value
+
+    def run_gene_drive_model(self, s: float, c: float, h: float, m: float, alpha: float,
+                             initial_q1: float, initial_q2: float,
+                             max_generations: int = 10000,
+                             convergence_threshold: float = 1e-10,
+                             accelerate: Optional[str] = None,
+                             history: Union[str, int, None] = "full") -> Tuple:
+        """Cached run_gene_drive_model; see simulation.run_gene_drive_model."""
+        params = self.quantize((s, c, h, m, alpha, initial_q1, initial_q2))
+        settings = (max_generations, convergence_threshold, accelerate, history)
+        return self.get_or_compute(
+            "run_gene_drive_model", params, settings,
+            lambda *p: run_gene_drive_model(*p, max_generations=max_generations,
+                                            convergence_threshold=convergence_threshold,
+                                            accelerate=accelerate, history=history))
+
+    def find_critical_migration(self, s: float, c: float, h: float, alpha: float = 1.0,
+                                initial_q1: float = 0.7, initial_q2: float = 0.1,
+                                precision: float = 0.001, k: int = 1,
+                                workers: Optional[int] = None, warm_start: bool = False) -> float:
+        """Cached find_critical_migration; workers does not change the result and is not keyed."""
+        params = self.quantize((s, c, h, alpha, initial_q1, initial_q2))
+        settings = (precision, k, warm_start)
+        return self.get_or_compute(
+            "find_critical_migration", params, settings,
+            lambda *p: find_critical_migration(*p, precision=precision, k=k,
+                                               workers=workers, warm_start=warm_start))
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current sizes."""
+        disk_entries = 0
+        if self._db is not None:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "memory_entries": len(self._memory), "disk_entries": disk_entries,
+                "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        """Drop every entry, in memory and on disk, and reset the counters."""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def close(self) -> None:
+        """Close the on-disk store; the in-memory level stays usable."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
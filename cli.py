@@ -0,0 +1,299 @@
+"""
+Command-Line Interface
+
+Headless entry point for batch work:
+
+    python cli.py run --s 0.5 --c 0.6 --h 0.3 --m 0.02 --q1 0.9 --q2 0.1
+    python cli.py sweep --s 0.3:0.9:61 --c 0.6 --h 0.3 --m 0:0.3:121 --out sweep.npy --workers 8
+    python cli.py mstar --s 0.6 --c 0.72 --h 1.0 --alpha 0.1:1:10
+    python cli.py basins --s 0.73 --c 1.0 --h 0.5 --m 0.09 --out basins.npy
+    python cli.py bench
+
+Parameters come from the command line or from a JSON/TOML file given with
+--config; keys at the top level of the file apply to every subcommand, keys in a
+table named after the subcommand only to that one, and command-line options win.
+Results are written to stdout as JSON lines; bulk output goes to .npy files or a
+columnar store. Matplotlib is pinned to the Agg backend, so nothing opens a window.
+"""
+
+import os
+
+os.environ["MPLBACKEND"] = "Agg"
+
+import argparse
+import contextlib
+import functools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gene_drive import OUTCOME_NAMES, classify_outcome
+
+MODEL_PARAMETERS = ("s", "c", "h", "m", "alpha")
+
+
+def parse_values(spec) -> np.ndarray:
+    """
+    Parse a parameter specification into an array of values.
+
+    Accepts a number, a list of numbers, "a,b,c" for explicit values or
+    "start:stop:num" for num evenly spaced values including both ends.
+    """
+    if isinstance(spec, (int, float)):
+        return np.array([float(spec)])
+    if isinstance(spec, (list, tuple)):
+        return np.array([float(v) for v in spec])
+    if ":" in spec:
+        start, stop, num = spec.split(":")
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(v) for v in spec.split(",")])
+
+
+def parse_value(spec) -> float:
+    """Parse a parameter specification that must hold exactly one value."""
+    values = parse_values(spec)
+    if values.size != 1:
+        raise ValueError(f"expected a single value, got {spec!r}")
+    return float(values[0])
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Read a JSON or TOML (by .toml extension) configuration file."""
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def emit(record: Dict[str, Any]) -> None:
+    """Write one JSON line to stdout."""
+    print(json.dumps(record), flush=True)
+
+
+def _outcome_counts(outcomes: np.ndarray) -> Dict[str, int]:
+    counts = np.bincount(np.asarray(outcomes).ravel(), minlength=len(OUTCOME_NAMES))
+    return {name: int(n) for name, n in zip(OUTCOME_NAMES, counts)}
+
+
+# ---------------- Subcommands ----------------
+
+def _run_release(params: Dict[str, float], q1: float, q2: float, max_generations: int,
+                 threshold: float, accelerate: Optional[str]) -> Dict[str, Any]:
+    """One release run as an output record; module-level so pool workers can pickle it."""
+    from simulation import run_gene_drive_model
+
+    stats: Dict[str, Any] = {}
+    final_q1, final_q2, _, _ = run_gene_drive_model(
+        *params.values(), q1, q2, max_generations=max_generations,
+        convergence_threshold=threshold, accelerate=accelerate,
+        stats=stats, history=None)
+    return {**params, "initial_q1": q1, "initial_q2": q2,
+            "q1": final_q1, "q2": final_q2,
+            "generations": stats["generations"], "converged": stats["converged"],
+            "outcome": OUTCOME_NAMES[int(classify_outcome(final_q1, final_q2))]}
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    params = {name: parse_value(getattr(args, name)) for name in MODEL_PARAMETERS}
+    release = functools.partial(_run_release, params, max_generations=args.max_generations,
+                                threshold=args.threshold, accelerate=args.accelerate)
+    q1s, q2s = ([float(q) for q in parse_values(spec)] for spec in (args.q1, args.q2))
+    pooled = args.workers is not None and args.workers > 1
+    with (ProcessPoolExecutor(max_workers=args.workers) if pooled else contextlib.nullcontext()) as executor:
+        # Records come out in release order either way
+        for record in (executor.map if pooled else map)(release, q1s, q2s):
+            emit(record)
+
+
+def cmd_sweep(args: argparse.Namespace) -> None:
+    from sweep import sweep
+
+    axes = [parse_values(getattr(args, name)) for name in MODEL_PARAMETERS]
+    result = sweep(*axes, out=args.out, initial_q1=parse_value(args.q1), initial_q2=parse_value(args.q2),
+                   chunk_size=args.chunk_size, workers=args.workers,
+                   max_generations=args.max_generations, convergence_threshold=args.threshold,
+                   accelerate=args.accelerate, resume=not args.restart)
+    if args.store:
+        _export_sweep(result, parse_value(args.q1), parse_value(args.q2), args.store, args.chunk_size)
+    emit({"out": args.out, "shape": list(result.grid.shape), "points": result.grid.size,
+          "resumed_points": result.resumed_points, "seconds": result.seconds,
+          "points_per_second": result.points_per_second,
+          "outcomes": _outcome_counts(result.results["outcome"])})
+
+
+def _export_sweep(result, initial_q1: float, initial_q2: float, path: str, chunk_size: int) -> None:
+    """
+    Append a finished sweep to a columnar store, unless the store already holds it.
+
+    The store tags the rows with the sweep's configuration hash, so a different sweep
+    is appended after them and an interrupted export of this one picks up where it stopped.
+    """
+    from store import ResultStore
+
+    store = ResultStore(path)
+    begin = store.sources.get(result.config, len(store))
+    end = min([row for row in store.sources.values() if row > begin], default=len(store))
+    if end < len(store) and end - begin < result.grid.size:
+        raise ValueError(f"store {path} holds a partial export of this sweep followed by other rows")
+    flat = result.results.reshape(-1)
+    for start in range(end - begin, result.grid.size, chunk_size):
+        stop = min(start + chunk_size, result.grid.size)
+        records = flat[start:stop]
+        batch = dict(zip(MODEL_PARAMETERS, result.grid.points(start, stop)))
+        batch.update(initial_q1=initial_q1, initial_q2=initial_q2, q1=records["q1"], q2=records["q2"],
+                     generations=records["generations"], outcome=records["outcome"])
+        store.append(batch, source=result.config)
+
+
+def cmd_mstar(args: argparse.Namespace) -> None:
+    params = {name: parse_value(getattr(args, name)) for name in ("s", "c", "h")}
+    q1, q2 = parse_value(args.q1), parse_value(args.q2)
+    # One pool for every alpha rather than one per search
+    pooled = args.method == "bisect" and args.k > 1 and args.workers is not None and args.workers > 1
+    with (ProcessPoolExecutor(max_workers=args.workers) if pooled else contextlib.nullcontext()) as executor:
+        for alpha in parse_values(args.alpha):
+            started = time.perf_counter()
+            if args.method == "fold":
+                from continuation import find_fold
+                fold = find_fold(*params.values(), float(alpha), q1, q2)
+                m_star = fold.m_star if fold is not None else None
+            else:
+                from simulation import find_critical_migration
+                m_star = find_critical_migration(*params.values(), float(alpha), q1, q2,
+                                                 precision=args.precision, k=args.k, workers=args.workers,
+                                                 warm_start=args.warm_start, executor=executor)
+            emit({**params, "alpha": float(alpha), "m_star": m_star, "method": args.method,
+                  "seconds": time.perf_counter() - started})
+
+
+def cmd_basins(args: argparse.Namespace) -> None:
+    from basins import basin_map
+
+    params = {name: parse_value(getattr(args, name)) for name in MODEL_PARAMETERS}
+    started = time.perf_counter()
+    result = basin_map(*params.values(), resolution=args.resolution, out=args.out,
+                       max_generations=args.max_generations, workers=args.workers)
+    counts = np.bincount(np.asarray(result.labels).ravel(), minlength=256)
+    emit({**params, "out": args.out, "resolution": args.resolution,
+          "attractors": [{"q1": float(a1), "q2": float(a2), "outcome": OUTCOME_NAMES[int(code)],
+                          "cells": int(counts[k])}
+                         for k, ((a1, a2), code) in enumerate(zip(result.attractors, result.outcomes))],
+          "unresolved": int(counts[255]), "seconds": time.perf_counter() - started})
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    import benchmarks
+
+    results = benchmarks.run_benchmarks(args.only, args.repeat,
+                                        lambda name, result: emit({"benchmark": name, **result}))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = benchmarks.compare(results, json.load(f), args.threshold)
+        for row in rows:
+            emit(row)
+        return int(any(row["regression"] for row in rows))
+    return 0
+
+
+# ---------------- Argument parsing ----------------
+
+def _add_model_options(parser: argparse.ArgumentParser, names=MODEL_PARAMETERS, alpha_default="1.0") -> None:
+    for name in names:
+        parser.add_argument(f"--{name}", default=alpha_default if name == "alpha" else None,
+                            help=f"{name}: a value, a,b,c or start:stop:num")
+
+
+def _add_workers_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for parallel execution (default: run in-process)")
+
+
+def _add_run_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--q1", default="0.7", help="initial frequency in deme 1")
+    parser.add_argument("--q2", default="0.1", help="initial frequency in deme 2")
+    parser.add_argument("--max-generations", type=int, default=10000)
+    parser.add_argument("--threshold", type=float, default=1e-10, help="convergence threshold")
+    parser.add_argument("--accelerate", choices=("aitken", "anderson"), default=None)
+    _add_workers_option(parser)
+
+
+def build_parser() -> Tuple[argparse.ArgumentParser, Dict[str, argparse.ArgumentParser]]:
+    """The top-level parser and the parser of each subcommand by name."""
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless gene drive model runs")
+    parser.add_argument("--config", help="JSON or TOML file with default option values")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="simulate single releases to equilibrium")
+    _add_model_options(run)
+    _add_run_options(run)
+    run.set_defaults(handler=cmd_run, required=MODEL_PARAMETERS)
+
+    sweep = commands.add_parser("sweep", help="record outcomes over a parameter grid")
+    _add_model_options(sweep)
+    _add_run_options(sweep)
+    sweep.add_argument("--out", help=".npy file for the structured results")
+    sweep.add_argument("--store", help="also append the results to a columnar store in this directory")
+    sweep.add_argument("--chunk-size", type=int, default=1 << 16)
+    sweep.add_argument("--restart", action="store_true", help="ignore the journal of an earlier run")
+    sweep.set_defaults(handler=cmd_sweep, required=MODEL_PARAMETERS + ("out",))
+
+    mstar = commands.add_parser("mstar", help="critical migration rate m* per alpha")
+    _add_model_options(mstar, ("s", "c", "h", "alpha"))
+    mstar.add_argument("--q1", default="0.7")
+    mstar.add_argument("--q2", default="0.1")
+    mstar.add_argument("--method", choices=("bisect", "fold"), default="bisect",
+                       help="bisection on simulations, or continuation to the DTE fold")
+    mstar.add_argument("--precision", type=float, default=0.001)
+    mstar.add_argument("--k", type=int, default=1, help="migration rates per round of the search")
+    _add_workers_option(mstar)
+    mstar.add_argument("--warm-start", action="store_true",
+                       help="follow the DTE branch to its fold instead of running from q1, q2")
+    mstar.set_defaults(handler=cmd_mstar, required=("s", "c", "h"))
+
+    basins = commands.add_parser("basins", help="basin-of-attraction map over (q1, q2)")
+    _add_model_options(basins)
+    basins.add_argument("--resolution", type=int, default=1000)
+    basins.add_argument("--max-generations", type=int, default=10000)
+    basins.add_argument("--out", default=None, help=".npy file for the uint8 labels")
+    _add_workers_option(basins)
+    basins.set_defaults(handler=cmd_basins, required=MODEL_PARAMETERS)
+
+    bench = commands.add_parser("bench", help="run the benchmark suite")
+    bench.add_argument("--only", default="*", help="glob pattern on benchmark names")
+    bench.add_argument("--repeat", type=int, default=None, help="override the repeats per benchmark")
+    bench.add_argument("--out", help="write the results as JSON to this file")
+    bench.add_argument("--baseline", help="JSON results to compare against")
+    bench.add_argument("--threshold", type=float, default=10.0,
+                       help="slowdown in percent flagged as a regression")
+    bench.set_defaults(handler=cmd_bench, required=())
+
+    return parser, commands.choices
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser, subparsers = build_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        # Config values become defaults, so options given on the command line still win
+        config = load_config(args.config)
+        defaults = {k: v for k, v in config.items() if not isinstance(v, dict)}
+        defaults.update(config.get(args.command, {}))
+        subparsers[args.command].set_defaults(**{k.replace("-", "_"): v for k, v in defaults.items()})
+        args = parser.parse_args(argv)
+    missing = [name for name in args.required if getattr(args, name) is None]
+    if missing:
+        parser.error(f"{args.command}: missing " + ", ".join(f"--{name}" for name in missing))
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Continuation of the DTE Equilibrium Branch
+
+The differential targeting equilibrium (DTE: the drive persists in the target
+deme but not in the non-target deme) disappears at a fold bifurcation, where it
+collides with a saddle as the migration rate m grows. Instead of bisecting m with
+full simulations, this module follows the DTE branch with pseudo-arclength
+continuation in (q1, q2, m) and pins the fold down exactly as the point on the
+branch where det(J - I) vanishes, J being the Jacobian of step_gene_drive.
+
+trace_critical_migration() then follows the fold itself through alpha, giving the
+m*(alpha) curve from one corrector solve per alpha value.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from equilibria import equilibrium
+from gene_drive import jacobian_gene_drive, parameter_derivatives_gene_drive, step_gene_drive
+
+
+class Fold(NamedTuple):
+    """Fold point of the DTE branch: m* and the equilibrium where DTE is lost."""
+    m_star: float
+    q1: float
+    q2: float
+    branch: np.ndarray  # (n, 3) array of (m, q1, q2) points along the DTE branch
+    steps: int  # accepted continuation steps
+
+
+class CriticalMigrationCurve(NamedTuple):
+    """m* traced over a range of alpha values; NaN where no fold was found."""
+    alpha: np.ndarray
+    m_star: np.ndarray
+    q1: np.ndarray
+    q2: np.ndarray
+
+
+def _residual(x: np.ndarray, s: float, c: float, h: float, alpha: float) -> np.ndarray:
+    """F(q; m) - q at x = (q1, q2, m)."""
+    f1, f2 = step_gene_drive(x[0], x[1], s, c, h, x[2], alpha)
+    return np.array([f1 - x[0], f2 - x[1]])
+
+
+def _residual_jacobian(x: np.ndarray, s: float, c: float, h: float, alpha: float) -> np.ndarray:
+    """2x3 Jacobian of the residual with respect to (q1, q2, m)."""
+    j11, j12, j21, j22 = jacobian_gene_drive(x[0], x[1], s, c, h, x[2], alpha)
+    dm1, dm2, _, _ = parameter_derivatives_gene_drive(x[0], x[1], s, c, h, x[2], alpha)
+    return np.array([[j11 - 1, j12, dm1], [j21, j22 - 1, dm2]])
+
+
+def _fold_test(x: np.ndarray, s: float, c: float, h: float, alpha: float) -> float:
+    """det(J - I), which changes sign where the branch folds back in m."""
+    a = _residual_jacobian(x, s, c, h, alpha)
+    return a[0, 0] * a[1, 1] - a[0, 1] * a[1, 0]
+
+
+def _tangent(x: np.ndarray, s: float, c: float, h: float, alpha: float) -> np.ndarray:
+    """Unit null vector of the 2x3 residual Jacobian: the cross product of its rows."""
+    a = _residual_jacobian(x, s, c, h, alpha)
+    t = np.cross(a[0], a[1])
+    return t / np.linalg.norm(t)
+
+
+def _locate_fold(x: np.ndarray, s: float, c: float, h: float, alpha: float,
+                 tol: float = 1e-12, max_iterations: int = 20) -> Optional[np.ndarray]:
+    """
+    Newton on the extended system F(q; m) - q = 0, det(J - I) = 0 in (q1, q2, m).
+
+    The determinant's gradient is taken by central differences; everything else
+    uses the analytic derivatives.
+    """
+    for _ in range(max_iterations):
+        g = np.append(_residual(x, s, c, h, alpha), _fold_test(x, s, c, h, alpha))
+        if np.max(np.abs(g)) < tol:
+            return x
+        grad = np.empty(3)
+        for i in range(3):
+            e = np.zeros(3)
+            e[i] = 1e-7
+            grad[i] = (_fold_test(x + e, s, c, h, alpha) - _fold_test(x - e, s, c, h, alpha)) / 2e-7
+        system = np.vstack([_residual_jacobian(x, s, c, h, alpha), grad])
+        try:
+            x = x - np.linalg.solve(system, g)
+        except np.linalg.LinAlgError:
+            return None
+    g = np.append(_residual(x, s, c, h, alpha), _fold_test(x, s, c, h, alpha))
+    return x if np.max(np.abs(g)) < 1e-9 else None
+
+
+def find_fold(s: float, c: float, h: float, alpha: float = 1.0,
+              initial_q1: float = 0.7, initial_q2: float = 0.1,
+              m_start: float = 1e-3, m_max: float = 0.5,
+              step: float = 0.01, min_step: float = 1e-8, max_step: float = 0.05,
+              max_steps: int = 2000) -> Optional[Fold]:
+    """
+    Follow the DTE branch in m by pseudo-arclength continuation and return its fold.
+
+    Parameters:
+    - s, c, h, alpha: gene drive configuration and migration asymmetry
+    - initial_q1, initial_q2: initial frequencies used to find the DTE equilibrium at m_start
+    - m_start: migration rate at which the branch is picked up
+    - m_max: stop if the branch survives beyond this migration rate
+    - step, min_step, max_step: initial, smallest and largest arclength step
+    - max_steps: maximum number of continuation steps
+
+    Returns:
+    - Fold with m* and the fold equilibrium, or None when there is no DTE at
+      m_start or the branch reaches m_max without folding
+    """
+    start = equilibrium(s, c, h, m_start, alpha, initial_q1, initial_q2)
+    if not start.converged or start.outcome != "dte":
+        return None
+
+    x = np.array([start.q1, start.q2, m_start])
+    t = _tangent(x, s, c, h, alpha)
+    if t[2] < 0:
+        t = -t
+    det = _fold_test(x, s, c, h, alpha)
+    branch = [x]
+    steps = 0
+
+    while steps < max_steps and step >= min_step:
+        # Predictor along the tangent, corrector on the arclength-constrained system
+        predicted = x + step * t
+        y = predicted.copy()
+        converged = False
+        for _ in range(8):
+            g = np.append(_residual(y, s, c, h, alpha), t @ (y - predicted))
+            if np.max(np.abs(g)) < 1e-12:
+                converged = True
+                break
+            system = np.vstack([_residual_jacobian(y, s, c, h, alpha), t])
+            try:
+                y = y - np.linalg.solve(system, g)
+            except np.linalg.LinAlgError:
+                break
+        if not converged or not (0 <= y[0] <= 1 and 0 <= y[1] <= 1):
+            step /= 2
+            continue
+
+        new_det = _fold_test(y, s, c, h, alpha)
+        if np.sign(new_det) != np.sign(det):
+            fold = _locate_fold((x + y) / 2, s, c, h, alpha)
+            if fold is not None:
+                branch.append(fold)
+                return Fold(float(fold[2]), float(fold[0]), float(fold[1]), np.array(branch)[:, [2, 0, 1]],
+                            steps + 1)
+            step /= 2
+            continue
+
+        new_t = _tangent(y, s, c, h, alpha)
+        if new_t @ t < 0:
+            new_t = -new_t
+        x, t, det = y, new_t, new_det
+        branch.append(x)
+        steps += 1
+        if x[2] > m_max:
+            return None
+        step = min(step * 1.5, max_step)
+
+    return None
+
+
+def trace_critical_migration(s: float, c: float, h: float, alphas,
+                             initial_q1: float = 0.7, initial_q2: float = 0.1,
+                             m_start: float = 1e-3, m_max: float = 0.5) -> CriticalMigrationCurve:
+    """
+    Trace m*(alpha) in one pass by continuing the fold point through alpha.
+
+    The fold at the first alpha comes from find_fold; each following alpha starts
+    the extended-system Newton solve from the previous fold, and only falls back to
+    a full branch continuation when that fails.
+
+    Parameters:
+    - s, c, h: gene drive configuration
+    - alphas: increasing or decreasing sequence of migration asymmetries
+    - initial_q1, initial_q2, m_start, m_max: passed to find_fold for fallbacks
+
+    Returns:
+    - CriticalMigrationCurve with m* and the fold equilibrium per alpha
+    """
+    alphas = np.asarray(alphas, dtype=np.float64)
+    m_star = np.full(alphas.shape, np.nan)
+    q1 = np.full(alphas.shape, np.nan)
+    q2 = np.full(alphas.shape, np.nan)
+    previous: Optional[np.ndarray] = None
+
+    for i, alpha in enumerate(alphas):
+        fold = _locate_fold(previous, s, c, h, alpha) if previous is not None else None
+        if fold is None or not 0 < fold[2] < m_max:
+            found = find_fold(s, c, h, alpha, initial_q1, initial_q2, m_start, m_max)
+            fold = np.array([found.q1, found.q2, found.m_star]) if found is not None else None
+        if fold is not None:
+            q1[i], q2[i], m_star[i] = fold
+        previous = fold
+
+    return CriticalMigrationCurve(alphas, m_star, q1, q2)
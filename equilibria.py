@@ -0,0 +1,423 @@
+"""
+Equilibria of the Two-Deme Gene Drive Model
+
+Solves the fixed-point equations of step_gene_drive directly instead of iterating
+the recurrence until successive generations stop changing. Newton's method with
+the analytic Jacobian from gene_drive.py converges in a handful of solves; a
+backtracking (damped) line search keeps it inside the unit square and makes it
+usable far from the root.
+
+fixed_points() and fixed_points_batch() go further and return every fixed point
+of the map with its stability, reducing the fixed-point equations to a single
+polynomial so whole parameter grids can be classified without simulation.
+"""
+
+import math
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from gene_drive import (OUTCOME_NAMES, DriveCoefficients, classify_outcome, gene_drive_coefficients,
+                        jacobian_gene_drive, step_gene_drive, step_gene_drive_batch)
+
+
+class Equilibrium(NamedTuple):
+    """An equilibrium of the two-deme map and what a trajectory reaching it looks like."""
+    q1: float
+    q2: float
+    stability: str  # "stable", "unstable" or "saddle"
+    eigenvalues: Tuple[complex, complex]
+    outcome: str  # basin label: "loss", "fixation", "dte" or "other"
+    converged: bool
+    generations: int  # generations iterated before Newton locked on
+    newton_iterations: int
+
+
+def jacobian_eigenvalues(j11, j12, j21, j22) -> Tuple[complex, complex]:
+    """Eigenvalues of a 2x2 Jacobian from its trace and determinant."""
+    trace = j11 + j22
+    det = j11 * j22 - j12 * j21
+    root = complex(trace * trace - 4 * det) ** 0.5
+    return (trace + root) / 2, (trace - root) / 2
+
+
+def classify_stability(eigenvalues: Tuple[complex, complex]) -> str:
+    """Label a fixed point of a map as stable, unstable or saddle from its eigenvalues."""
+    inside = sum(abs(ev) < 1 for ev in eigenvalues)
+    if inside == len(eigenvalues):
+        return "stable"
+    if inside == 0:
+        return "unstable"
+    return "saddle"
+
+
+def newton_fixed_point(s: float, c: float, h: float, m: float, alpha: float,
+                       q1: float, q2: float, tol: float = 1e-12,
+                       max_iterations: int = 50) -> Tuple[float, float, bool, int]:
+    """
+    Solve q = step_gene_drive(q) by damped Newton iteration from (q1, q2).
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters
+    - q1, q2: starting point
+    - tol: residual |step_gene_drive(q) - q| (max norm) at which to stop
+    - max_iterations: maximum number of Newton steps
+
+    Returns:
+    - the root found, whether the residual reached tol, and the number of Newton steps
+    """
+    f1, f2 = step_gene_drive(q1, q2, s, c, h, m, alpha)
+    g1, g2 = f1 - q1, f2 - q2
+    residual = max(abs(g1), abs(g2))
+
+    iterations = 0
+    for iterations in range(max_iterations):
+        if residual < tol:
+            break
+
+        # Newton direction for G(q) = F(q) - q, with J_G = J_F - I
+        j11, j12, j21, j22 = jacobian_gene_drive(q1, q2, s, c, h, m, alpha)
+        j11, j22 = j11 - 1, j22 - 1
+        det = j11 * j22 - j12 * j21
+        if det == 0 or not math.isfinite(det):
+            break
+        d1 = (-g1 * j22 + g2 * j12) / det
+        d2 = (-g2 * j11 + g1 * j21) / det
+
+        # Damped fallback: halve the step until the residual decreases
+        step = 1.0
+        while step > 1e-10:
+            t1 = min(max(q1 + step * d1, 0.0), 1.0)
+            t2 = min(max(q2 + step * d2, 0.0), 1.0)
+            f1, f2 = step_gene_drive(t1, t2, s, c, h, m, alpha)
+            trial = max(abs(f1 - t1), abs(f2 - t2))
+            if trial < (1 - 1e-4 * step) * residual:
+                break
+            step /= 2
+        else:
+            break
+
+        q1, q2 = t1, t2
+        g1, g2 = f1 - q1, f2 - q2
+        residual = trial
+    else:
+        iterations = max_iterations
+
+    return float(q1), float(q2), residual < tol, iterations
+
+
+def equilibrium(s: float, c: float, h: float, m: float, alpha: float,
+                initial_q1: float, initial_q2: float,
+                max_generations: int = 10000, tol: float = 1e-12,
+                burst: int = 8, capture_radius: float = 1e-3) -> Equilibrium:
+    """
+    Find the equilibrium that the trajectory from (initial_q1, initial_q2) converges to.
+
+    Alternates short bursts of the recurrence with Newton solves. A Newton root is
+    accepted once it is stable and the trajectory closes in on it monotonically until
+    it is within capture_radius, which identifies the basin the initial condition
+    belongs to. Bursts double in length after each rejected root, so slow passages
+    near bifurcations cost a logarithmic number of solves.
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters, as in run_gene_drive_model
+    - initial_q1, initial_q2: initial frequencies in deme 1 and deme 2
+    - max_generations: maximum number of generations to iterate between solves
+    - tol: residual at which a Newton root counts as a fixed point
+    - burst: generations iterated before the first solve
+    - capture_radius: distance to a stable root at which the trajectory counts as captured
+
+    Returns:
+    - Equilibrium with the fixed point, its stability and the basin label
+    """
+    q1, q2 = initial_q1, initial_q2
+    generations = 0
+    newton_total = 0
+    root: Optional[Tuple[float, float]] = None
+
+    while root is None:
+        r1, r2, ok, iterations = newton_fixed_point(s, c, h, m, alpha, q1, q2, tol=tol)
+        newton_total += iterations
+        if ok and classify_stability(jacobian_eigenvalues(
+                *jacobian_gene_drive(r1, r2, s, c, h, m, alpha))) == "stable":
+            # Attracted if the trajectory closes in on the root at every step
+            # until it is inside the neighbourhood where the linearization holds
+            dist = max(abs(q1 - r1), abs(q2 - r2))
+            for _ in range(min(burst, max_generations - generations)):
+                q1, q2 = step_gene_drive(q1, q2, s, c, h, m, alpha)
+                generations += 1
+                new_dist = max(abs(q1 - r1), abs(q2 - r2))
+                if new_dist > dist:
+                    break
+                dist = new_dist
+                if dist < capture_radius:
+                    root = (r1, r2)
+                    break
+            if root is not None:
+                break
+
+        if generations >= max_generations:
+            break
+        for _ in range(min(burst, max_generations - generations)):
+            q1, q2 = step_gene_drive(q1, q2, s, c, h, m, alpha)
+            generations += 1
+        burst *= 2
+
+    converged = root is not None
+    if not converged:
+        # No stable root: report wherever the trajectory got to
+        root = (q1, q2)
+    r1, r2 = float(root[0]), float(root[1])
+    eigenvalues = jacobian_eigenvalues(*jacobian_gene_drive(r1, r2, s, c, h, m, alpha))
+    outcome = OUTCOME_NAMES[int(classify_outcome(r1, r2))]
+    return Equilibrium(r1, r2, classify_stability(eigenvalues), eigenvalues, outcome,
+                       converged, generations, newton_total)
+
+
+# ---------------- All Fixed Points ----------------
+# Stability codes for the batched API, so results fit in uint8 arrays
+STABLE, UNSTABLE, SADDLE = 0, 1, 2
+STABILITY_NAMES = ("stable", "unstable", "saddle")
+# The fixed-point condition reduces to a polynomial of degree 9 (see _fixed_point_polynomial),
+# and the decoupled case m = 0 has at most 3 x 3 fixed points, so 9 slots always suffice
+MAX_FIXED_POINTS = 9
+
+
+class FixedPoint(NamedTuple):
+    """A fixed point of the two-deme map with its linear stability."""
+    q1: float
+    q2: float
+    eigenvalues: Tuple[complex, complex]
+    stability: str  # "stable", "unstable" or "saddle"
+
+
+class FixedPointGrid(NamedTuple):
+    """
+    Fixed points of many parameter sets at once.
+
+    Every field has the broadcast shape of the parameters plus a trailing axis of
+    MAX_FIXED_POINTS slots (and one more axis of 2 for eigenvalues). Slots beyond
+    count are padding: NaN frequencies and eigenvalues, stability 255.
+    """
+    q1: np.ndarray
+    q2: np.ndarray
+    eigenvalues: np.ndarray
+    stability: np.ndarray
+    count: np.ndarray
+
+
+def jacobian_eigenvalues_batch(j11, j12, j21, j22) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized jacobian_eigenvalues: complex eigenvalue arrays of stacked 2x2 Jacobians."""
+    trace = np.asarray(j11 + j22, dtype=np.complex128)
+    det = j11 * j22 - j12 * j21
+    root = np.sqrt(trace * trace - 4 * det)
+    return (trace + root) / 2, (trace - root) / 2
+
+
+def classify_stability_batch(ev1: np.ndarray, ev2: np.ndarray) -> np.ndarray:
+    """Vectorized classify_stability returning STABLE/UNSTABLE/SADDLE codes as uint8."""
+    inside = (np.abs(ev1) < 1).astype(np.uint8) + (np.abs(ev2) < 1)
+    return np.choose(inside, (UNSTABLE, SADDLE, STABLE)).astype(np.uint8)
+
+
+def _polymul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Multiply stacks of polynomials, coefficients in increasing degree along the last axis."""
+    out = np.zeros(a.shape[:-1] + (a.shape[-1] + b.shape[-1] - 1,))
+    for i in range(a.shape[-1]):
+        out[..., i:i + b.shape[-1]] += a[..., i:i + 1] * b
+    return out
+
+
+def _polyadd(*polys: np.ndarray) -> np.ndarray:
+    """Add stacks of polynomials of possibly different degrees."""
+    out = np.zeros(polys[0].shape[:-1] + (max(p.shape[-1] for p in polys),))
+    for p in polys:
+        out[..., :p.shape[-1]] += p
+    return out
+
+
+def _fixed_point_polynomial(coef: DriveCoefficients) -> Tuple[np.ndarray, ...]:
+    """
+    Reduce the fixed-point equations to one polynomial in p, the post-migration
+    frequency in deme 1.
+
+    With g(p) = N(p)/W(p) the selection/conversion phase, a fixed point satisfies
+    q1 = N(p)/W(p), q2 = C(p)/B(p) and g(A(p)/B(p)) = q2, where p2 = A/B is the
+    post-migration frequency in deme 2. Clearing denominators in the last
+    condition gives a polynomial of degree 9 in p.
+
+    Returns:
+    - coefficient stacks (increasing degree) of the degree-9 polynomial and of
+      N, W, C and B, which map a root p back to (q1, q2)
+    """
+    zero = np.zeros_like(coef.w_hom)
+    one = np.ones_like(coef.w_hom)
+    n_poly = np.stack([zero, 2 * coef.w_gain, coef.w_hom - 2 * coef.w_gain], axis=-1)
+    w_poly = np.stack([one, 2 * coef.w_het - 2, coef.w_hom - 2 * coef.w_het + 1], axis=-1)
+    p_poly = np.stack([zero, one], axis=-1)
+
+    b_poly = coef.a12[..., None] * w_poly
+    c_poly = _polyadd(_polymul(p_poly, w_poly), -coef.a11[..., None] * n_poly)
+    a_poly = _polyadd((coef.a21 * coef.a12)[..., None] * n_poly, coef.a22[..., None] * c_poly)
+
+    def homogeneous(poly):
+        # B^2 * poly(A/B) for a quadratic poly
+        return _polyadd(poly[..., 0:1] * _polymul(b_poly, b_poly),
+                        poly[..., 1:2] * _polymul(a_poly, b_poly),
+                        poly[..., 2:3] * _polymul(a_poly, a_poly))
+
+    poly = _polyadd(_polymul(c_poly, homogeneous(w_poly)), -_polymul(b_poly, homogeneous(n_poly)))
+    return poly, n_poly, w_poly, c_poly, b_poly
+
+
+def _polyval(poly: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Evaluate stacks of polynomials at x, which has an extra trailing axis of points."""
+    out = np.zeros(x.shape)
+    for k in range(poly.shape[-1] - 1, -1, -1):
+        out = out * x + poly[..., k:k + 1]
+    return out
+
+
+def _polyroots(poly: np.ndarray) -> np.ndarray:
+    """
+    Roots of a 2-d stack of polynomials, padded with NaN to the full degree.
+
+    Polynomials with a healthy leading coefficient go through one batched eigenvalue
+    solve of their companion matrices; the rest are trimmed and solved one by one.
+    """
+    degree = poly.shape[-1] - 1
+    roots = np.full(poly.shape[:-1] + (degree,), np.nan, dtype=np.complex128)
+    scale = np.max(np.abs(poly), axis=-1)
+    regular = np.abs(poly[..., -1]) > 1e-10 * scale
+
+    if regular.any():
+        monic = poly[regular] / poly[regular][..., -1:]
+        companion = np.zeros(monic.shape[:-1] + (degree, degree))
+        companion[..., np.arange(1, degree), np.arange(degree - 1)] = 1
+        companion[..., :, -1] = -monic[..., :-1]
+        roots[regular] = np.linalg.eigvals(companion)
+
+    for index in np.nonzero(~regular)[0]:
+        coeffs = poly[index]
+        keep = np.nonzero(np.abs(coeffs) > 1e-10 * scale[index])[0]
+        if keep.size < 2:
+            continue
+        found = np.polynomial.polynomial.polyroots(coeffs[:keep[-1] + 1])
+        roots[index, :found.size] = found
+    return roots
+
+
+def _polish(q1, q2, s, c, h, m, alpha, iterations: int = 8):
+    """A few undamped Newton steps on every candidate at once; returns the residual too."""
+    for _ in range(iterations):
+        f1, f2 = step_gene_drive_batch(q1, q2, s, c, h, m, alpha)
+        g1, g2 = f1 - q1, f2 - q2
+        j11, j12, j21, j22 = jacobian_gene_drive(q1, q2, s, c, h, m, alpha)
+        j11, j22 = j11 - 1, j22 - 1
+        det = j11 * j22 - j12 * j21
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d1 = np.where(det != 0, (-g1 * j22 + g2 * j12) / det, 0.0)
+            d2 = np.where(det != 0, (-g2 * j11 + g1 * j21) / det, 0.0)
+        q1 = np.clip(np.where(np.isfinite(d1), q1 + d1, q1), 0.0, 1.0)
+        q2 = np.clip(np.where(np.isfinite(d2), q2 + d2, q2), 0.0, 1.0)
+    f1, f2 = step_gene_drive_batch(q1, q2, s, c, h, m, alpha)
+    return q1, q2, np.maximum(np.abs(f1 - q1), np.abs(f2 - q2))
+
+
+def fixed_points_batch(s, c, h, m, alpha, tol: float = 1e-9) -> FixedPointGrid:
+    """
+    Find every fixed point in the unit square for arrays of parameter sets.
+
+    The fixed-point equations are reduced to a degree-9 polynomial whose real roots
+    in [0, 1] are mapped back to (q1, q2) and polished with Newton's method, so no
+    trajectories are simulated. Parameter sets without migration (m = 0) decouple
+    into two one-deme maps and are handled separately.
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters (scalars or arrays, broadcast together)
+    - tol: residual below which a polished root counts as a fixed point
+
+    Returns:
+    - FixedPointGrid with the fixed points sorted by q1 then q2, their Jacobian
+      eigenvalues and stability codes (STABLE, UNSTABLE or SADDLE)
+    """
+    s, c, h, m, alpha = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64)
+                                              for x in (s, c, h, m, alpha)))
+    shape = s.shape
+    s, c, h, m, alpha = (x.ravel() for x in (s, c, h, m, alpha))
+    coef = gene_drive_coefficients(s, c, h, m, alpha)
+    poly, n_poly, w_poly, c_poly, b_poly = _fixed_point_polynomial(coef)
+    roots = _polyroots(poly)
+
+    # Roots near the real interval [0, 1] mapped back to frequencies. Clustered roots
+    # near p = 1 are ill-conditioned, so the windows are generous: Newton polishing and
+    # the residual test below decide what is really a fixed point
+    p = roots.real
+    usable = (np.abs(roots.imag) < 1e-2) & (p > -0.05) & (p < 1.05)
+    p = np.where(usable, p, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q1 = _polyval(n_poly, p) / _polyval(w_poly, p)
+        q2 = _polyval(c_poly, p) / _polyval(b_poly, p)
+
+    # Products of the one-deme fixed points: exact when m = 0, where the polynomial
+    # degenerates, and good starting points when migration is weak. They include
+    # loss (0, 0) and fixation (1, 1), which are always fixed points
+    one_deme = _polyadd(_polymul(np.stack([np.zeros_like(coef.w_hom), np.ones_like(coef.w_hom)], axis=-1),
+                                 w_poly), -n_poly)
+    one_deme_roots = _polyroots(one_deme)
+    x = np.where(np.abs(one_deme_roots.imag) < 1e-6, one_deme_roots.real, np.nan)
+    q1 = np.concatenate([q1, np.repeat(x, 3, axis=-1)], axis=-1)
+    q2 = np.concatenate([q2, np.tile(x, 3)], axis=-1)
+
+    candidates = (q1 > -0.05) & (q1 < 1.05) & (q2 > -0.05) & (q2 < 1.05)
+    q1 = np.where(candidates, np.clip(q1, 0.0, 1.0), 0.5)
+    q2 = np.where(candidates, np.clip(q2, 0.0, 1.0), 0.5)
+    expand = tuple(x[..., None] for x in (s, c, h, m, alpha))
+    q1, q2, residual = _polish(q1, q2, *expand)
+    found = candidates & (residual < tol)
+
+    # Sort, drop duplicates (double roots and repeated polishing targets), pack left
+    q1 = np.where(found, q1, np.inf)
+    q2 = np.where(found, q2, np.inf)
+    order = np.lexsort((q2, q1), axis=-1)
+    q1 = np.take_along_axis(q1, order, axis=-1)
+    q2 = np.take_along_axis(q2, order, axis=-1)
+    duplicate = np.zeros(q1.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for k in range(1, q1.shape[-1]):
+            duplicate[..., k] = ((np.abs(q1[..., :k] - q1[..., k:k + 1]) < 1e-7)
+                                 & (np.abs(q2[..., :k] - q2[..., k:k + 1]) < 1e-7)).any(axis=-1)
+    keep = np.isfinite(q1) & ~duplicate
+    order = np.argsort(~keep, axis=-1, kind="stable")
+    order = order[..., :MAX_FIXED_POINTS]
+    keep = np.take_along_axis(keep, order, axis=-1)
+    q1 = np.where(keep, np.take_along_axis(q1, order, axis=-1), np.nan)
+    q2 = np.where(keep, np.take_along_axis(q2, order, axis=-1), np.nan)
+
+    ev1, ev2 = jacobian_eigenvalues_batch(*jacobian_gene_drive(q1, q2, *expand))
+    stability = np.where(keep, classify_stability_batch(ev1, ev2), 255).astype(np.uint8)
+    eigenvalues = np.stack([ev1, ev2], axis=-1)
+    eigenvalues[~keep] = np.nan
+    return FixedPointGrid(q1.reshape(shape + (MAX_FIXED_POINTS,)),
+                          q2.reshape(shape + (MAX_FIXED_POINTS,)),
+                          eigenvalues.reshape(shape + (MAX_FIXED_POINTS, 2)),
+                          stability.reshape(shape + (MAX_FIXED_POINTS,)),
+                          keep.sum(axis=-1).reshape(shape))
+
+
+def fixed_points(s: float, c: float, h: float, m: float, alpha: float) -> List[FixedPoint]:
+    """
+    Every fixed point of the two-deme map for one parameter set.
+
+    Parameters:
+    - s, c, h, m, alpha: model parameters, as in run_gene_drive_model
+
+    Returns:
+    - list of FixedPoint sorted by q1 then q2, each with its Jacobian eigenvalues
+      and a stable/unstable/saddle label
+    """
+    grid = fixed_points_batch(s, c, h, m, alpha)
+    return [FixedPoint(float(grid.q1[k]), float(grid.q2[k]),
+                       (complex(grid.eigenvalues[k, 0]), complex(grid.eigenvalues[k, 1])),
+                       STABILITY_NAMES[grid.stability[k]])
+            for k in range(int(grid.count))]
@@ -0,0 +1,339 @@
+"""
+Gene Drive Model Kernel
+
+One-generation recurrence of the two-deme gene drive model from Greenbaum et al.
+(2021) with asymmetric migration. This is the single implementation shared by the
+interactive simulator (mousemod.py) and the analysis code (simulation.py).
+
+The module only depends on NumPy and has no import-time side effects, so worker
+processes can import it cheaply. Three variants of the step are provided:
+- step_gene_drive: plain Python floats, one parameter set at a time
+- step_gene_drive_batch: NumPy arrays of parameter sets, broadcast together
+- step_with_coefficients: the batched step on precomputed per-run constants,
+  optionally writing into caller-owned arrays with out=
+
+The selection and conversion phase is also exposed on its own
+(select_gene_drive), for engines with their own migration step such as ndeme.py.
+
+iter_gene_drive streams a single trajectory one generation at a time, stopping
+on pluggable rules such as converged(), crossed() and generation_cap().
+"""
+
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+# ---------------- Scalar Step ----------------
+# This function updates allele frequencies in both demes for one generation
+def step_gene_drive(q1, q2, s, c, h, m, alpha):
+    # Migration phase with asymmetric rates
+    # From the paper: q̃₁ = [(1-αm)q₁ + mq₂] / (1-αm+m)
+    # and q̃₂ = [(1-m)q₂ + αmq₁] / (1-m+αm)
+    q1_post = ((1 - alpha*m) * q1 + m * q2) / (1 - alpha*m + m)
+    q2_post = ((1 - m) * q2 + alpha*m * q1) / (1 - m + alpha*m)
+    # Selection components
+    s_n = 0.5 * (1 - c) * (1 - h * s)  # non-converted heterozygotes
+    s_c = c * (1 - s)  # converted heterozygotes (conversion before selection)
+    # Mean fitness in each deme
+    w1 = (q1_post**2 * (1 - s)
+          + 2 * q1_post * (1 - q1_post) * (2*s_n + s_c)
+          + (1 - q1_post)**2)
+    w2 = (q2_post**2 * (1 - s)
+          + 2 * q2_post * (1 - q2_post) * (2*s_n + s_c)
+          + (1 - q2_post)**2)
+    # Selection phase
+    q1_next = ((q1_post**2 * (1 - s)
+                + 2 * q1_post * (1 - q1_post) * (s_n + s_c)) / w1)
+    q2_next = ((q2_post**2 * (1 - s)
+                + 2 * q2_post * (1 - q2_post) * (s_n + s_c)) / w2)
+    return q1_next, q2_next
+
+
+# ---------------- Batched Step ----------------
+class DriveCoefficients(NamedTuple):
+    """Per-run constants of the recurrence, precomputed once per parameter set."""
+    a11: np.ndarray  # share of deme 1 after migration that was already in deme 1
+    a12: np.ndarray  # share of deme 1 after migration that came from deme 2
+    a21: np.ndarray  # share of deme 2 after migration that came from deme 1
+    a22: np.ndarray  # share of deme 2 after migration that was already in deme 2
+    w_hom: np.ndarray  # fitness of drive homozygotes
+    w_het: np.ndarray  # heterozygote contribution to mean fitness
+    w_gain: np.ndarray  # heterozygote contribution to drive allele transmission
+
+    def compress(self, keep: np.ndarray) -> "DriveCoefficients":
+        """Return the coefficients of the runs selected by a mask or index array."""
+        return DriveCoefficients(*(a[keep] for a in self))
+
+
+def gene_drive_coefficients(s, c, h, m, alpha) -> DriveCoefficients:
+    """
+    Precompute the per-run constants of the recurrence.
+    
+    Parameters:
+    - s, c, h, m, alpha: model parameters (scalars or arrays, broadcast together)
+    
+    Returns:
+    - DriveCoefficients whose fields all have the broadcast shape
+    """
+    s, c, h, m, alpha = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64)
+                                              for x in (s, c, h, m, alpha)))
+    return _coefficients(s, c, h, m, alpha)
+
+
+def _coefficients(s, c, h, m, alpha) -> DriveCoefficients:
+    # Plain arithmetic, so Python floats stay Python floats for the scalar paths
+    d1 = 1 - alpha*m + m
+    d2 = 1 - m + alpha*m
+    return DriveCoefficients((1 - alpha*m) / d1, m / d1,
+                             alpha*m / d2, (1 - m) / d2,
+                             *_selection_coefficients(s, c, h))
+
+
+# ---------------- Selection Phase ----------------
+# The deme-local half of the step; the two-deme step above and the multi-deme
+# engines all apply it to their post-migration frequencies.
+class SelectionCoefficients(NamedTuple):
+    """Fitness constants of the selection and conversion phase."""
+    w_hom: np.ndarray  # fitness of drive homozygotes
+    w_het: np.ndarray  # heterozygote contribution to mean fitness
+    w_gain: np.ndarray  # heterozygote contribution to drive allele transmission
+
+
+def selection_coefficients(s, c, h) -> SelectionCoefficients:
+    """
+    Precompute the fitness constants for the selection phase.
+    
+    Parameters:
+    - s, c, h: selection, conversion and dominance (scalars or arrays, e.g. one per deme)
+    
+    Returns:
+    - SelectionCoefficients with the broadcast shape of the inputs
+    """
+    s, c, h = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (s, c, h)))
+    return SelectionCoefficients(*_selection_coefficients(s, c, h))
+
+
+def _selection_coefficients(s, c, h) -> Tuple:
+    s_n = 0.5 * (1 - c) * (1 - h * s)  # non-converted heterozygotes
+    s_c = c * (1 - s)  # converted heterozygotes (conversion before selection)
+    return 1 - s, 2*s_n + s_c, s_n + s_c
+
+
+def select_gene_drive(p: np.ndarray, w_hom, w_het, w_gain,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Apply selection and conversion to post-migration drive frequencies.
+    
+    Parameters:
+    - p: drive allele frequencies after migration, any shape
+    - w_hom, w_het, w_gain: fitness constants (see SelectionCoefficients), broadcastable against p
+    - out: optional array to write the result into; may be p itself
+    
+    Returns:
+    - drive allele frequencies in the next generation
+    """
+    hom = p * p * w_hom
+    het = 2 * p * (1 - p)
+    mean_fitness = hom + het * w_het + (1 - p)**2
+    return np.divide(hom + het * w_gain, mean_fitness, out=out)
+
+
+def step_with_coefficients(q1: np.ndarray, q2: np.ndarray, coef: DriveCoefficients,
+                           out: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                           ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance a batch of runs by one generation using precomputed coefficients.
+    
+    Parameters:
+    - q1, q2: current frequencies in deme 1 and deme 2
+    - coef: constants from gene_drive_coefficients, broadcastable against q1 and q2
+    - out: optional pair of arrays to write the next frequencies into; these may be
+      q1 and q2 themselves to update the state in place
+    
+    Returns:
+    - next frequencies in both demes (the arrays in out when given)
+    """
+    p1 = coef.a11 * q1 + coef.a12 * q2
+    p2 = coef.a21 * q1 + coef.a22 * q2
+    if out is None:
+        out = (np.empty_like(p1), np.empty_like(p2))
+    select_gene_drive(p1, coef.w_hom, coef.w_het, coef.w_gain, out=out[0])
+    select_gene_drive(p2, coef.w_hom, coef.w_het, coef.w_gain, out=out[1])
+    return out
+
+
+def step_gene_drive_batch(q1, q2, s, c, h, m, alpha,
+                          out: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                          ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized step_gene_drive: advance every run in a batch by one generation.
+    
+    Parameters:
+    - q1, q2: current frequencies in deme 1 and deme 2 (scalars or arrays)
+    - s, c, h, m, alpha: model parameters (scalars or arrays)
+    - out: optional pair of arrays to write the next frequencies into
+    
+    Returns:
+    - next frequencies in both demes, with the broadcast shape of all inputs
+    """
+    q1 = np.asarray(q1, dtype=np.float64)
+    q2 = np.asarray(q2, dtype=np.float64)
+    return step_with_coefficients(q1, q2, gene_drive_coefficients(s, c, h, m, alpha), out=out)
+
+
+# ---------------- Derivatives ----------------
+def _selection_slope(p, coef: DriveCoefficients):
+    """Derivative of the selection/conversion phase with respect to the post-migration frequency."""
+    het = 2 * p * (1 - p)
+    transmitted = p * p * coef.w_hom + het * coef.w_gain
+    mean_fitness = p * p * coef.w_hom + het * coef.w_het + (1 - p)**2
+    d_transmitted = 2 * p * coef.w_hom + 2 * (1 - 2*p) * coef.w_gain
+    d_mean_fitness = 2 * p * coef.w_hom + 2 * (1 - 2*p) * coef.w_het - 2 * (1 - p)
+    return (d_transmitted * mean_fitness - transmitted * d_mean_fitness) / mean_fitness**2
+
+
+def jacobian_gene_drive(q1, q2, s, c, h, m, alpha) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Analytic Jacobian of step_gene_drive with respect to (q1, q2).
+    
+    Parameters:
+    - q1, q2: frequencies at which to evaluate the Jacobian (scalars or arrays)
+    - s, c, h, m, alpha: model parameters (scalars or arrays)
+    
+    Returns:
+    - the entries (j11, j12, j21, j22), where j12 is d(q1_next)/d(q2)
+    """
+    return jacobian_with_coefficients(q1, q2, _coefficients(s, c, h, m, alpha))
+
+
+def jacobian_with_coefficients(q1, q2, coef: DriveCoefficients
+                               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """jacobian_gene_drive from precomputed coefficients, as step_with_coefficients is to step_gene_drive."""
+    p1 = coef.a11 * q1 + coef.a12 * q2
+    p2 = coef.a21 * q1 + coef.a22 * q2
+    slope1 = _selection_slope(p1, coef)
+    slope2 = _selection_slope(p2, coef)
+    return slope1 * coef.a11, slope1 * coef.a12, slope2 * coef.a21, slope2 * coef.a22
+
+
+# ---------------- Outcomes ----------------
+# Equilibrium outcomes, stored as small integer codes so they fit in uint8 arrays
+OUTCOME_LOSS = 0  # drive lost from both demes
+OUTCOME_FIXATION = 1  # drive fixed in both demes
+OUTCOME_DTE = 2  # differential targeting: drive persists in deme 1 above deme 2
+OUTCOME_OTHER = 3  # anything else, e.g. the drive higher in the non-target deme
+OUTCOME_NAMES = ("loss", "fixation", "dte", "other")
+
+
+def classify_outcome(q1, q2, tol: float = 1e-6):
+    """
+    Classify equilibrium frequencies as loss, fixation, DTE or other.
+    
+    Parameters:
+    - q1, q2: equilibrium frequencies (scalars or arrays)
+    - tol: distance from 0 or 1 below which a frequency counts as lost or fixed,
+      and the margin by which q1 must exceed q2 for DTE; symmetric equilibria
+      (q1 == q2 up to rounding) are "other", never DTE
+    
+    Returns:
+    - OUTCOME_* codes as a uint8 array with the broadcast shape of q1 and q2
+    """
+    q1, q2 = np.broadcast_arrays(np.asarray(q1, dtype=np.float64),
+                                 np.asarray(q2, dtype=np.float64))
+    outcome = np.full(q1.shape, OUTCOME_OTHER, dtype=np.uint8)
+    outcome[(q1 - q2 > tol) & (q1 > tol) & (q2 < 1 - tol)] = OUTCOME_DTE
+    outcome[(q1 < tol) & (q2 < tol)] = OUTCOME_LOSS
+    outcome[(q1 > 1 - tol) & (q2 > 1 - tol)] = OUTCOME_FIXATION
+    return outcome
+
+
+def parameter_derivatives_gene_drive(q1, q2, s, c, h, m, alpha) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Analytic derivatives of step_gene_drive with respect to m and alpha.
+    
+    Parameters:
+    - q1, q2: frequencies at which to evaluate the derivatives (scalars or arrays)
+    - s, c, h, m, alpha: model parameters (scalars or arrays)
+    
+    Returns:
+    - (dq1_next/dm, dq2_next/dm, dq1_next/dalpha, dq2_next/dalpha)
+    """
+    coef = _coefficients(s, c, h, m, alpha)
+    p1 = coef.a11 * q1 + coef.a12 * q2
+    p2 = coef.a21 * q1 + coef.a22 * q2
+    slope1 = _selection_slope(p1, coef)
+    slope2 = _selection_slope(p2, coef)
+    # Post-migration frequencies are q1 + m(q2 - q1)/d1 and q2 + αm(q1 - q2)/d2
+    d1_sq = (1 - alpha*m + m)**2
+    d2_sq = (1 - m + alpha*m)**2
+    return (slope1 * (q2 - q1) / d1_sq,
+            slope2 * alpha * (q1 - q2) / d2_sq,
+            slope1 * m * m * (q2 - q1) / d1_sq,
+            slope2 * m * (1 - m) * (q1 - q2) / d2_sq)
+
+
+# ---------------- Streaming Trajectories ----------------
+class DriveRecord(NamedTuple):
+    """One generation of a trajectory."""
+    generation: int
+    q1: float
+    q2: float
+
+
+# A stop rule looks at the previous and the current record and returns True to stop
+StopRule = Callable[[DriveRecord, DriveRecord], bool]
+
+
+def converged(threshold: float = 1e-10) -> StopRule:
+    """Stop once neither deme moved by threshold or more in the last generation."""
+    def rule(prev: DriveRecord, cur: DriveRecord) -> bool:
+        return abs(cur.q1 - prev.q1) < threshold and abs(cur.q2 - prev.q2) < threshold
+    return rule
+
+
+def crossed(threshold: float, deme: int = 1) -> StopRule:
+    """Stop once the frequency in deme 1 or 2 crosses threshold, in either direction."""
+    if deme not in (1, 2):
+        raise ValueError(f"deme must be 1 or 2, not {deme!r}")
+    def rule(prev: DriveRecord, cur: DriveRecord) -> bool:
+        before, after = (prev.q1, cur.q1) if deme == 1 else (prev.q2, cur.q2)
+        return (before - threshold) * (after - threshold) <= 0 and before != after
+    return rule
+
+
+def generation_cap(max_generations: int) -> StopRule:
+    """Stop once max_generations generations have been simulated."""
+    def rule(prev: DriveRecord, cur: DriveRecord) -> bool:
+        return cur.generation >= max_generations
+    return rule
+
+
+def iter_gene_drive(s: float, c: float, h: float, m: float, alpha: float,
+                    initial_q1: float, initial_q2: float,
+                    stop: Iterable[StopRule] = (converged(), generation_cap(10000))
+                    ) -> Iterator[DriveRecord]:
+    """
+    Yield a trajectory of the two-deme model one generation at a time.
+    
+    Memory use is constant; consumers can stop early, write records out or plot
+    them as they arrive. The initial state is yielded as generation 0.
+    
+    Parameters:
+    - s, c, h, m, alpha: model parameters, as in simulation.run_gene_drive_model
+    - initial_q1, initial_q2: initial frequencies in deme 1 and deme 2
+    - stop: rules checked after every generation; the record that triggers any
+      of them is yielded last. With no rules the generator runs forever
+    
+    Returns:
+    - iterator of DriveRecord(generation, q1, q2)
+    """
+    stop = tuple(stop)
+    record = DriveRecord(0, initial_q1, initial_q2)
+    yield record
+    while True:
+        q1, q2 = step_gene_drive(record.q1, record.q2, s, c, h, m, alpha)
+        prev, record = record, DriveRecord(record.generation + 1, q1, q2)
+        yield record
+        if any(rule(prev, record) for rule in stop):
+            return
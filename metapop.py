@@ -0,0 +1,316 @@
+"""
+Sparse Metapopulation Engine
+
+Runs the gene drive model on landscapes of 10^4 to 10^5 demes connected by a
+sparse graph. Migration is a scipy.sparse CSR operator built with the same
+normalization as ndeme.migration_matrix, so a generation costs O(edges) rather
+than O(N^2); the selection and conversion phase is the kernel's select_gene_drive.
+
+Frequencies are kept as an (N, B) array: B runs share the landscape and may differ
+in their parameters, which broadcast per deme and per run. Every generation the
+engine records where the drive front is: the graph distance from the release
+demes of the farthest deme in which the drive exceeds a threshold, and how many
+demes it holds. Watched demes, e.g. non-target patches far from the release,
+have their full frequency trajectory recorded for spillover analysis.
+
+run_chain is the stepping-stone special case, a corridor of demes between the
+target and the non-target population. Its migration is a tridiagonal stencil
+applied in place, O(N) per generation with no operator matrix at all.
+"""
+
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+
+from gene_drive import SelectionCoefficients, select_gene_drive, selection_coefficients
+
+
+class MetapopResult(NamedTuple):
+    """Outcome of a metapopulation run with B parameter sets."""
+    q: np.ndarray  # (N, B) final drive allele frequencies
+    generations: np.ndarray  # (B,) generations until convergence (max_generations if not)
+    converged: np.ndarray  # (B,)
+    front: np.ndarray  # (G + 1, B) hop distance of the farthest deme above the threshold, -1 if none
+    occupied: np.ndarray  # (G + 1, B) number of demes above the threshold
+    watched: Optional[np.ndarray]  # (G + 1, len(watch), B) frequencies of the watched demes
+    distances: np.ndarray  # (N,) hop distance of every deme from the release demes (inf if unreachable)
+
+
+def sparse_migration_operator(rates) -> sp.csr_matrix:
+    """
+    Sparse row-stochastic migration operator from dispersal rates.
+
+    rates[i, j] (i != j) is the fraction of deme j that moves to deme i each
+    generation. Normalization as in ndeme.migration_matrix: deme i keeps what does
+    not leave, receives its immigrants and is rescaled to sum to one.
+
+    Parameters:
+    - rates: (N, N) sparse (or dense) matrix of dispersal fractions
+
+    Returns:
+    - (N, N) CSR operator M, applied as M @ q
+    """
+    rates = sp.csr_matrix(rates, dtype=np.float64)
+    rates.setdiag(0.0)
+    rates.eliminate_zeros()
+    stay = 1 - np.asarray(rates.sum(axis=0)).ravel()
+    if np.any(stay < 0):
+        raise ValueError("dispersal rates out of a deme sum to more than 1")
+    size = stay + np.asarray(rates.sum(axis=1)).ravel()
+    operator = sp.diags(1 / size) @ (rates + sp.diags(stay))
+    return sp.csr_matrix(operator)
+
+
+def neighbour_rates(adjacency, m: float) -> sp.csr_matrix:
+    """
+    Dispersal rates where every deme sends a fraction m of its population, split
+    evenly among its neighbours.
+
+    Parameters:
+    - adjacency: (N, N) symmetric 0/1 sparse matrix of the landscape graph
+    - m: fraction of each deme that emigrates per generation
+
+    Returns:
+    - (N, N) CSR matrix of rates for sparse_migration_operator
+    """
+    adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+    degree = np.asarray(adjacency.sum(axis=0)).ravel()
+    with np.errstate(divide="ignore"):
+        share = np.where(degree > 0, m / degree, 0.0)
+    return sp.csr_matrix(adjacency @ sp.diags(share))
+
+
+def lattice_adjacency(rows: int, cols: int) -> sp.csr_matrix:
+    """4-neighbour adjacency of a rows x cols grid of demes, numbered row by row."""
+    index = np.arange(rows * cols).reshape(rows, cols)
+    right = (index[:, :-1].ravel(), index[:, 1:].ravel())
+    down = (index[:-1, :].ravel(), index[1:, :].ravel())
+    i = np.concatenate([right[0], down[0]])
+    j = np.concatenate([right[1], down[1]])
+    upper = sp.coo_matrix((np.ones(i.size), (i, j)), shape=(rows * cols,) * 2)
+    return sp.csr_matrix(upper + upper.T)
+
+
+def hop_distances(operator, sources: Sequence[int]) -> np.ndarray:
+    """Graph distance in migration steps from the nearest source deme (inf if unreachable)."""
+    # One multi-source search, O(edges) however many sources, not one search per source
+    return dijkstra(operator, directed=False, unweighted=True, indices=np.asarray(sources), min_only=True)
+
+
+def _per_run(x) -> np.ndarray:
+    # Runs are stored as rows, q[b] the (N,) landscape of run b: (N,) per deme
+    # broadcasts along the rows, (1, B) and (N, B) parameters are transposed
+    x = np.asarray(x, dtype=np.float64)
+    return x.T if x.ndim == 2 else x
+
+
+def _initial_state(initial_q, *params) -> np.ndarray:
+    """(B, N) copy of initial_q, with the batch size from initial_q or the parameters, whichever is wider."""
+    q = np.array(initial_q, dtype=np.float64)
+    if q.ndim == 1:
+        q = q[:, None]
+    shape = np.broadcast_shapes(q.T.shape, *(np.shape(x) for x in params))
+    return np.broadcast_to(q.T, shape).copy()
+
+
+def _simulate(q: np.ndarray, selection: SelectionCoefficients,
+              migrate: Callable[[np.ndarray, np.ndarray], None], distances: np.ndarray,
+              max_generations: int, convergence_threshold: float, front_threshold: float,
+              watch: Optional[Sequence[int]]) -> MetapopResult:
+    """
+    Generation loop shared by the landscape engines.
+
+    Parameters:
+    - q: (B, N) initial frequencies, one run per row; updated in place
+    - selection: fitness constants broadcastable against q
+    - migrate: migrate(q, out) writes the post-migration frequencies into out
+    - distances: (N,) distance of every deme from the release, inf if unreachable
+    - max_generations, convergence_threshold, front_threshold, watch: as in run_metapopulation
+
+    Returns:
+    - MetapopResult
+    """
+    batch = q.shape[0]
+    finite = np.where(np.isfinite(distances), distances, -1.0)
+    watch = None if watch is None else np.asarray(watch)
+
+    generations = np.full(batch, max_generations, dtype=np.int64)
+    converged = np.zeros(batch, dtype=bool)
+    fronts, occupied, watched = [], [], []
+
+    def record(q):
+        reached = q > front_threshold
+        fronts.append(np.where(reached, finite, -1.0).max(axis=1))
+        occupied.append(np.count_nonzero(reached, axis=1))
+        if watch is not None:
+            watched.append(q[:, watch].T.copy())
+
+    p = np.empty_like(q)
+    q_next = np.empty_like(q)
+    record(q)
+    for generation in range(max_generations):
+        migrate(q, p)
+        select_gene_drive(p, *selection, out=q_next)
+        step = np.abs(q_next - q).max(axis=1)
+        q, q_next = q_next, q
+        record(q)
+        done = ~converged & (step < convergence_threshold)
+        generations[done] = generation + 1
+        converged |= done
+        if converged.all():
+            break
+
+    return MetapopResult(q.T, generations, converged, np.array(fronts), np.array(occupied),
+                         np.array(watched) if watch is not None else None, distances)
+
+
+def run_metapopulation(s, c, h, operator, initial_q,
+                       max_generations: int = 10000,
+                       convergence_threshold: float = 1e-10,
+                       front_threshold: float = 0.5,
+                       sources: Optional[Sequence[int]] = None,
+                       watch: Optional[Sequence[int]] = None) -> MetapopResult:
+    """
+    Run the model on a sparse landscape for a batch of parameter sets.
+
+    Parameters:
+    - s, c, h: selection, conversion and dominance; scalars, (N,) per deme,
+      (B,) per run as (1, B), or (N, B)
+    - operator: (N, N) sparse migration operator from sparse_migration_operator
+    - initial_q: (N,) or (N, B) initial drive allele frequencies
+    - max_generations: maximum number of generations to simulate
+    - convergence_threshold: a run has converged once no deme moves by more than this
+    - front_threshold: frequency above which a deme counts as reached by the drive
+    - sources: release demes the front distance is measured from; by default the
+      demes starting above front_threshold in any run
+    - watch: demes whose frequencies are recorded every generation
+
+    Returns:
+    - MetapopResult with final frequencies and per-generation front positions
+    """
+    operator = sp.csr_matrix(operator, dtype=np.float64)
+    n = np.shape(initial_q)[0]
+    if operator.shape != (n, n):
+        raise ValueError(f"operator of shape {operator.shape} does not match {n} demes")
+    selection = selection_coefficients(_per_run(s), _per_run(c), _per_run(h))
+    q = _initial_state(initial_q, selection.w_hom)
+
+    if sources is None:
+        sources = np.flatnonzero((q > front_threshold).any(axis=0))
+    distances = (hop_distances(operator, sources) if len(sources)
+                 else np.full(n, np.inf))
+
+    def migrate(q, out):
+        # One sparse matvec per run keeps the rows contiguous
+        for b in range(q.shape[0]):
+            out[b] = operator @ q[b]
+
+    return _simulate(q, selection, migrate, distances,
+                     max_generations, convergence_threshold, front_threshold, watch)
+
+
+# ---------------- Stepping-Stone Chain ----------------
+# A linear corridor of demes, e.g. a peninsula or a river, with the target
+# population at deme 0 and the non-target population at deme N - 1.
+class ChainStencil(NamedTuple):
+    """Tridiagonal migration stencil of a chain: p[i] = lower[i]*q[i-1] + diag[i]*q[i] + upper[i]*q[i+1]."""
+    lower: np.ndarray  # share of deme i drawn from deme i - 1 (unused at i = 0)
+    diag: np.ndarray  # share of deme i that stayed
+    upper: np.ndarray  # share of deme i drawn from deme i + 1 (unused at i = N - 1)
+
+
+def chain_stencil(n: int, m, alpha) -> ChainStencil:
+    """
+    Migration stencil of a stepping-stone chain of n demes.
+
+    Every link carries a fraction m of the far deme toward the target end and
+    alpha*m of the near deme away from it, the two directions of the two-deme model.
+    Demes are renormalized by their new size, so the end demes get exactly the
+    coefficients of gene_drive_coefficients and n = 2 is the two-deme model.
+
+    Parameters:
+    - n: number of demes, at least 2
+    - m, alpha: scalars or per-run arrays of shape (B, 1)
+
+    Returns:
+    - ChainStencil whose fields broadcast to (B, n)
+    """
+    if n < 2:
+        raise ValueError("a chain needs at least 2 demes")
+    m = np.asarray(m, dtype=np.float64)
+    alpha = np.asarray(alpha, dtype=np.float64)
+    has_prev = (np.arange(n) > 0).astype(np.float64)
+    has_next = (np.arange(n) < n - 1).astype(np.float64)
+    forward = alpha*m * has_next  # leaves deme i for i + 1
+    backward = m * has_prev  # leaves deme i for i - 1
+    stay = 1 - forward - backward
+    if np.any(stay < 0):
+        raise ValueError("m * (1 + alpha) exceeds 1 for the inner demes of the chain")
+    size = stay + m * has_next + alpha*m * has_prev
+    return ChainStencil(alpha*m / size, stay / size, m / size)
+
+
+def migrate_chain(q: np.ndarray, stencil: ChainStencil, out: np.ndarray,
+                  scratch: np.ndarray) -> np.ndarray:
+    """
+    Apply a chain stencil along the last axis with O(N) work and no allocation.
+
+    The products are summed in the same order as the two-deme step, so a chain
+    of two demes reproduces step_with_coefficients bit for bit.
+
+    Parameters:
+    - q: (..., N) frequencies before migration
+    - stencil: coefficients from chain_stencil, broadcastable against q
+    - out: array of q's shape for the result; must not be q
+    - scratch: work array of q's shape
+
+    Returns:
+    - out
+    """
+    lower, diag, upper = np.broadcast_arrays(*stencil, q)[:3]
+    np.multiply(diag, q, out=out)
+    np.multiply(lower[..., 1:], q[..., :-1], out=scratch[..., 1:])
+    np.add(scratch[..., 1:], out[..., 1:], out=out[..., 1:])
+    np.multiply(upper[..., :-1], q[..., 1:], out=scratch[..., :-1])
+    np.add(out[..., :-1], scratch[..., :-1], out=out[..., :-1])
+    return out
+
+
+def run_chain(s, c, h, m, alpha, initial_q,
+              max_generations: int = 10000,
+              convergence_threshold: float = 1e-10,
+              front_threshold: float = 0.5,
+              watch: Optional[Sequence[int]] = None) -> MetapopResult:
+    """
+    Run the model on a stepping-stone chain for a batch of parameter sets.
+
+    The front is the index of the farthest deme above front_threshold, i.e. how
+    far the drive released at deme 0 has travelled along the chain.
+
+    Parameters:
+    - s, c, h: selection, conversion and dominance; scalars, (N,) per deme,
+      (B,) per run as (1, B), or (N, B)
+    - m, alpha: migration rate and asymmetry of every link; scalars or (1, B) per run
+    - initial_q: (N,) or (N, B) initial drive allele frequencies
+    - max_generations: maximum number of generations to simulate
+    - convergence_threshold: a run has converged once no deme moves by more than this
+    - front_threshold: frequency above which a deme counts as reached by the drive
+    - watch: demes whose frequencies are recorded every generation
+
+    Returns:
+    - MetapopResult with final frequencies and per-generation front positions
+    """
+    n = np.shape(initial_q)[0]
+    selection = selection_coefficients(_per_run(s), _per_run(c), _per_run(h))
+    stencil = chain_stencil(n, _per_run(m), _per_run(alpha))
+    q = _initial_state(initial_q, selection.w_hom, *stencil)
+    stencil = ChainStencil(*np.broadcast_arrays(*stencil, q)[:3])
+    scratch = np.empty_like(q)
+
+    def migrate(q, out):
+        migrate_chain(q, stencil, out, scratch)
+
+    return _simulate(q, selection, migrate, np.arange(n, dtype=np.float64),
+                     max_generations, convergence_threshold, front_threshold, watch)
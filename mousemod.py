@@ -7,6 +7,11 @@ key parameters such as selection, conversion, dominance, and migration via slide
 and observe the allele frequencies and population changes through animated mice
 and real-time plotting.
 
+All game state lives in a MouseModApp; importing the module opens no window.
+Each frame the app handles input, advances the simulation with update(dt) and
+draws with render(surface). The clock that paces frames and supplies dt is
+pluggable, so the game can run headless at a fixed time step.
+
 Created with:
 - Pygame for animation and UI
 - Matplotlib for plotting allele frequency dynamics
@@ -14,33 +19,19 @@ Created with:
 """
 
 import pygame
+import argparse
+import json
 import math
-import sys
+import os
 import random
+import time
 import numpy as np
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-# ---------------- Gene Drive Simulation Logic ----------------
-# This function updates allele frequencies in both demes for one generation
-def step_gene_drive(q1, q2, s, c, h, m, alpha):
-    q1_post = ((1 - alpha*m) * q1 + m * q2) / (1 - alpha*m + m)
-    q2_post = ((1 - m) * q2 + alpha*m * q1) / (1 - m + alpha*m)
-    s_n = 0.5 * (1 - c) * (1 - h * s)
-    s_c = c * (1 - s)
-    w1 = (q1_post**2 * (1 - s)
-          + 2 * q1_post * (1 - q1_post) * (2*s_n + s_c)
-          + (1 - q1_post)**2)
-    w2 = (q2_post**2 * (1 - s)
-          + 2 * q2_post * (1 - q2_post) * (2*s_n + s_c)
-          + (1 - q2_post)**2)
-    q1_next = ((q1_post**2 * (1 - s)
-                + 2 * q1_post * (1 - q1_post) * (s_n + s_c)) / w1)
-    q2_next = ((q2_post**2 * (1 - s)
-                + 2 * q2_post * (1 - q2_post) * (s_n + s_c)) / w2)
-    return q1_next, q2_next
+from gene_drive import converged, iter_gene_drive
 
 # UI element for controlling simulation parameters interactively
 class Slider:
@@ -92,10 +83,8 @@ class Mouse:
         self.group = new_group
         # self.migrating = True
 
-    def draw(self, surf):
-        img = {(1,'aa'): g1wt_img, (1,'Aa'): g1ht_img, (1,'AA'): g1mt_img,
-               (2,'aa'): g2wt_img, (2,'Aa'): g2ht_img, (2,'AA'): g2mt_img}[
-               (self.group, self.genotype)]
+    def draw(self, surf, images):
+        img = images[(self.group, self.genotype)]
         rect = img.get_rect(center=self.pos)
         surf.blit(img, rect)
 
@@ -118,93 +107,38 @@ class Mouse:
         if (nx-center[0])**2 + (ny-center[1])**2 <= (radius-10)**2:
             self.pos = [nx, ny]
 
-# ---------------- Initialization ----------------
-# Initialize Pygame and create screen, load background
-pygame.init()
+# ---------------- Constants ----------------
 SCREEN_W, SCREEN_H = 1000, 600
-screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
-clock = pygame.time.Clock()
-
-# Load images
-# Background image
-background_img = pygame.image.load("images/background.png")
-background_img = pygame.transform.scale(background_img, (SCREEN_W, SCREEN_H))
-# group1 images
-g1wt_img = pygame.image.load("images/Rats/group1_wt_resized.png")
-g1ht_img = pygame.image.load("images/Rats/group1_het_resized.png")
-g1mt_img = pygame.image.load("images/Rats/group1_mutant_resized.png")
-# group2 images
-g2wt_img = pygame.image.load("images/Rats/group2_wt_resized.png")
-g2ht_img = pygame.image.load("images/Rats/group2_het_resized.png")
-g2mt_img = pygame.image.load("images/Rats/group2_mutant_resized.png")
-
-# Parameters
-s, c, h = 0.5, 0.8, 0.3
-m = 0.05
-alpha = 1.0
-q1, q2 = 0.7, 0.1
-GENERATION = 0
+# Images are loaded relative to this file so the game starts from any working directory
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+# Default parameters, restored by the Reset button
+DEFAULTS = {"s": 0.5, "c": 0.8, "h": 0.3, "m": 0.05, "q1": 0.7, "q2": 0.1}
+ALPHA = 1.0
 
 CENTER1 = (SCREEN_W//5 - 10, SCREEN_H//2 + 140)
 CENTER2 = (2*SCREEN_W//5 + 20, SCREEN_H//2 - 90)
 ISLAND_R = 130
 NUM_MICE = 20
 STEP_DELAY_MS = 100
-last_update_time = pygame.time.get_ticks()
-
-hist_q1, hist_q2 = [], []
-
-font = pygame.font.SysFont(None, 26)
-
-# Create interactive sliders for each simulation parameter
-sliders = [
-    Slider(490, 480, "s",  0.0, 1.0, s),
-    Slider(490, 520, "c",  0.0, 1.0, c),
-    Slider(490, 560, "h",  0.0, 1.0, h),
-    Slider(680, 480, "m",  0.0, 0.5, m),
-    Slider(680, 520, "q1", 0.0, 1.0, q1),
-    Slider(680, 560, "q2", 0.0, 1.0, q2),
-]
-run_button = pygame.Rect(860, 470, 100, 40)
-reset_button = pygame.Rect(860, 525, 100, 40)
-auto_run = False
-
-# Function to randomly generate mice population based on current allele frequency
-# Initialize mice populations
-def reinit_mice():
-    def init(q, center, group_id):
-        counts = np.random.multinomial(NUM_MICE, [q**2, 2*q*(1-q), (1-q)**2])
-        gens = ['AA']*counts[0] + ['Aa']*counts[1] + ['aa']*counts[2]
-        random.shuffle(gens)
-        arr = []
-        for gt in gens:
-            ang = random.uniform(0,2*np.pi)
-            rad = random.uniform(0, ISLAND_R-15)
-            x = int(center[0] + rad*np.cos(ang))
-            y = int(center[1] + rad*np.sin(ang))
-            arr.append(Mouse((x,y), gt, group_id))
-        return arr
-    return init(q1, CENTER1, 1), init(q2, CENTER2, 2)
-
-mice1, mice2 = reinit_mice()
-
-# ---------------- Plot Setup ----------------
-# Initialize matplotlib plot for allele frequency over generations
-fig = plt.figure(figsize=(4, 3.8), dpi=85)
-ax = fig.add_subplot(111)
-line1, = ax.plot([], [], label='Deme 1', color='red')
-line2, = ax.plot([], [], label='Deme 2', color='blue')
-ax.set_xlim(0, 100)
-ax.set_ylim(0, 1)
-ax.set_title("Gene Drive Dynamics")
-ax.set_xlabel("Generation")
-ax.set_ylabel("Allele Frequency")
-ax.legend()
-canvas = FigureCanvasAgg(fig)
+HISTORY_LEN = 100
+
+# Randomly generate a mice population based on the current allele frequency
+def init_mice(q, center, group_id):
+    counts = np.random.multinomial(NUM_MICE, [q**2, 2*q*(1-q), (1-q)**2])
+    gens = ['AA']*counts[0] + ['Aa']*counts[1] + ['aa']*counts[2]
+    random.shuffle(gens)
+    arr = []
+    for gt in gens:
+        ang = random.uniform(0,2*np.pi)
+        rad = random.uniform(0, ISLAND_R-15)
+        x = int(center[0] + rad*np.cos(ang))
+        y = int(center[1] + rad*np.sin(ang))
+        arr.append(Mouse((x,y), gt, group_id))
+    return arr
 
 # Update genotypes of mice based on new allele frequencies
-# Update genotypes
-def update_genotypes(mice, q, center, group_id):
+def update_genotypes(mice, q, center):
     counts = np.random.multinomial(NUM_MICE, [q**2, 2*q*(1-q), (1-q)**2])
     gens = ['AA']*counts[0] + ['Aa']*counts[1] + ['aa']*counts[2]
     random.shuffle(gens)
@@ -212,109 +146,312 @@ def update_genotypes(mice, q, center, group_id):
         mouse.genotype = gt
         mouse.move(center, ISLAND_R)
 
-# ---------------- Main Simulation Loop ----------------
-# Handles events, updates simulation, and draws visuals
-while True:
-    now = pygame.time.get_ticks()
-    # Read parameter values from sliders each frame
-    s = sliders[0].value
-    c = sliders[1].value
-    h = sliders[2].value
-    m = sliders[3].value
-
-    for event in pygame.event.get():
+def load_images():
+    """Background and mouse sprites, keyed by (group, genotype) for the mice."""
+    background = pygame.image.load(os.path.join(IMAGE_DIR, "background.png"))
+    background = pygame.transform.scale(background, (SCREEN_W, SCREEN_H))
+    names = {'aa': "wt", 'Aa': "het", 'AA': "mutant"}
+    mice = {(group, gt): pygame.image.load(os.path.join(IMAGE_DIR, "Rats", f"group{group}_{name}_resized.png"))
+            for group in (1, 2) for gt, name in names.items()}
+    return background, mice
+
+# ---------------- Clocks ----------------
+# A clock paces the frame loop: tick(fps) waits as needed and returns the
+# milliseconds since the previous tick. pygame.time.Clock fits this interface.
+class FixedClock:
+    """Clock for headless runs: never waits and reports the same dt every frame."""
+    def __init__(self, dt_ms=1000/60):
+        self.dt_ms = dt_ms
+
+    def tick(self, fps=0):
+        return self.dt_ms
+
+# ---------------- Application ----------------
+class MouseModApp:
+    """
+    One game instance: simulation state, widgets and plot.
+
+    Parameters:
+    - headless: use the SDL dummy video driver, so no display is needed
+    - clock: frame clock with tick(fps) -> dt in ms (default pygame.time.Clock)
+    - step_delay_ms: simulated milliseconds between generations (0 steps every update)
+    - display: open the (possibly dummy) display; without it, render() into any surface
+    """
+
+    def __init__(self, headless=False, clock=None, step_delay_ms=STEP_DELAY_MS, display=True):
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.headless = headless
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_W, SCREEN_H)) if display else None
+        self.clock = clock if clock is not None else pygame.time.Clock()
+        self.step_delay_ms = step_delay_ms
+        self.background_img, self.mouse_images = load_images()
+        self.font = pygame.font.SysFont(None, 26)
+
+        # Create interactive sliders for each simulation parameter
+        self.sliders = {
+            "s": Slider(490, 480, "s",  0.0, 1.0, DEFAULTS["s"]),
+            "c": Slider(490, 520, "c",  0.0, 1.0, DEFAULTS["c"]),
+            "h": Slider(490, 560, "h",  0.0, 1.0, DEFAULTS["h"]),
+            "m": Slider(680, 480, "m",  0.0, 0.5, DEFAULTS["m"]),
+            "q1": Slider(680, 520, "q1", 0.0, 1.0, DEFAULTS["q1"]),
+            "q2": Slider(680, 560, "q2", 0.0, 1.0, DEFAULTS["q2"]),
+        }
+        self.run_button = pygame.Rect(860, 470, 100, 40)
+        self.reset_button = pygame.Rect(860, 525, 100, 40)
+
+        # ---------------- Plot Setup ----------------
+        # Matplotlib figure for allele frequency over generations, drawn off-screen
+        self.fig = Figure(figsize=(4, 3.8), dpi=85)
+        self.ax = self.fig.add_subplot(111)
+        self.line1, = self.ax.plot([], [], label='Deme 1', color='red')
+        self.line2, = self.ax.plot([], [], label='Deme 2', color='blue')
+        self.ax.set_xlim(0, 100)
+        self.ax.set_ylim(0, 1)
+        self.ax.set_title("Gene Drive Dynamics")
+        self.ax.set_xlabel("Generation")
+        self.ax.set_ylabel("Allele Frequency")
+        self.ax.legend()
+        self.canvas = FigureCanvasAgg(self.fig)
+
+        self.reset()
+        self.running = True
+
+    @property
+    def params(self):
+        """Current (s, c, h, m, alpha) from the sliders."""
+        return (self.sliders["s"].value, self.sliders["c"].value, self.sliders["h"].value,
+                self.sliders["m"].value, ALPHA)
+
+    def reset(self):
+        """Restore default parameters and restart the simulation."""
+        for name, value in DEFAULTS.items():
+            self.sliders[name].value = value
+        self.q1, self.q2 = DEFAULTS["q1"], DEFAULTS["q2"]
+        self.generation = 0
+        self.hist_q1, self.hist_q2 = [], []
+        self.mice1 = init_mice(self.q1, CENTER1, 1)
+        self.mice2 = init_mice(self.q2, CENTER2, 2)
+        # Running trajectory and the parameters it was started with
+        self.trajectory, self.trajectory_params = None, None
+        self.auto_run = False
+        self.since_step_ms = 0.0
+
+    # ---------------- Input ----------------
+    def handle_event(self, event):
         if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
+            self.running = False
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if run_button.collidepoint(event.pos):
-                auto_run = not auto_run
-            elif reset_button.collidepoint(event.pos):
-                # Reset to default values
-                s, c, h, m = 0.5, 0.8, 0.3, 0.05
-                q1, q2 = 0.7, 0.1
-                # Reset sliders visually
-                sliders[0].value = s
-                sliders[1].value = c
-                sliders[2].value = h
-                sliders[3].value = m
-                sliders[4].value = q1
-                sliders[5].value = q2
-                # Reset sim state
-                GENERATION = 0
-                hist_q1.clear()
-                hist_q2.clear()
-                mice1, mice2 = reinit_mice()
-                auto_run = False
-
-        for sl in sliders:
+            if self.run_button.collidepoint(event.pos):
+                self.auto_run = not self.auto_run
+            elif self.reset_button.collidepoint(event.pos):
+                self.reset()
+        for sl in self.sliders.values():
             sl.handle_event(event)
 
-    if auto_run and now - last_update_time >= STEP_DELAY_MS:
-        
-        q1_next, q2_next = step_gene_drive(q1, q2, s, c, h, m, alpha)
-        if abs(q1 - q1_next) < 1e-6 and abs(q2 - q2_next) < 1e-6:
-            auto_run = False
-        else:
-            q1, q2 = q1_next, q2_next
-            GENERATION += 1
-            hist_q1.append(q1)
-            hist_q2.append(q2)
-            if len(hist_q1) > 100:
-                hist_q1.pop(0)
-                hist_q2.pop(0)
-            # migration: mark migrants
-            n_mig = int(round(m * NUM_MICE))
-            if n_mig > 0:
-                migrants1 = random.sample(mice1, n_mig)
-                for mouse in migrants1:
-                    mice1.remove(mouse)
-                    mice2.append(mouse)
-                    mouse.start_migration(CENTER2, 2)
-                migrants2 = random.sample(mice2, n_mig)
-                for mouse in migrants2:
-                    mice2.remove(mouse)
-                    mice1.append(mouse)
-                    mouse.start_migration(CENTER1, 1)
-            # update genotypes after migration
-            update_genotypes(mice1, q1, CENTER1, 1)
-            update_genotypes(mice2, q2, CENTER2, 2)
-            last_update_time = now
-    screen.blit(background_img, (0, 0))
-    # pygame.draw.circle(screen, (130,200,130), CENTER1, ISLAND_R)
-    # pygame.draw.circle(screen, (130,200,130), CENTER2, ISLAND_R)
-
-    # Move & draw mice on top
-    for m in mice1 + mice2:
-        if auto_run:
-            m.move(CENTER1 if m.group==1 else CENTER2)
-        m.draw(screen)
-
-    # Draw Run and Reset buttons
-    pygame.draw.rect(screen, (135,169,107), run_button, border_radius=10)
-    pygame.draw.rect(screen, (135,169,107), reset_button, border_radius=10)
-    run_text = font.render("Run" if not auto_run else "Pause", True, (255,255,255))
-    run_text_rect = run_text.get_rect(center=run_button.center)
-    screen.blit(run_text, run_text_rect)
-    reset_text = font.render("Reset", True, (255,255,255))
-    reset_text_rect = reset_text.get_rect(center=reset_button.center)
-    screen.blit(reset_text, reset_text_rect)
-
-    for sl in sliders:
-        sl.draw(screen, font)
-
-    gen_text = font.render(f"Gen: {GENERATION}   q1={q1:.3f}   q2={q2:.3f}", True, (20,20,20))
-    screen.blit(gen_text, (SCREEN_W - gen_text.get_width() - 20, 20))
-
-    ax.set_xlim(0, max(100, GENERATION))
-    line1.set_data(range(len(hist_q1)), hist_q1)
-    line2.set_data(range(len(hist_q2)), hist_q2)
-    canvas.draw()
-    raw = canvas.get_renderer().tostring_rgb()
-    surf = pygame.image.fromstring(raw, canvas.get_width_height(), "RGB")
-    
-    # Draw the plot
-    screen.blit(surf, (SCREEN_W - surf.get_width(), 60))
-
-    pygame.display.flip()
-    clock.tick(60)
\ No newline at end of file
+    def script_events(self, step):
+        """
+        Mouse events playing back one scripted step, e.g. {"click": "run"} or
+        {"slider": "m", "value": 0.2}, through the same input handling as a player.
+        """
+        events = []
+        if "click" in step:
+            button = {"run": self.run_button, "reset": self.reset_button}[step["click"]]
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=button.center, button=1))
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=button.center, button=1))
+        if "slider" in step:
+            sl = self.sliders[step["slider"]]
+            frac = (sl.value - sl.min_val) / (sl.max_val - sl.min_val)
+            knob = (int(sl.x + frac * sl.w), sl.y + sl.h//2)
+            target_frac = (step["value"] - sl.min_val) / (sl.max_val - sl.min_val)
+            target = (sl.x + target_frac * sl.w, knob[1])
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=knob, button=1))
+            events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=target, rel=(0, 0), buttons=(1, 0, 0)))
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=target, button=1))
+        return events
+
+    # ---------------- Simulation ----------------
+    def step_generation(self):
+        """Advance the simulation by one generation; stop running once it converges."""
+        params = self.params
+        # Restart the trajectory from the current state whenever a slider moved
+        if self.trajectory is None or self.trajectory_params != params:
+            self.trajectory = iter_gene_drive(*params, self.q1, self.q2, stop=(converged(1e-6),))
+            self.trajectory_params = params
+            next(self.trajectory)  # generation 0 is the current state
+        record = next(self.trajectory, None)
+        if record is None:
+            self.auto_run = False
+            self.trajectory = None
+            return
+        self.q1, self.q2 = record.q1, record.q2
+        self.generation += 1
+        self.hist_q1.append(self.q1)
+        self.hist_q2.append(self.q2)
+        if len(self.hist_q1) > HISTORY_LEN:
+            self.hist_q1.pop(0)
+            self.hist_q2.pop(0)
+        # migration: mark migrants
+        n_mig = int(round(params[3] * NUM_MICE))
+        if n_mig > 0:
+            migrants1 = random.sample(self.mice1, n_mig)
+            for mouse in migrants1:
+                self.mice1.remove(mouse)
+                self.mice2.append(mouse)
+                mouse.start_migration(CENTER2, 2)
+            migrants2 = random.sample(self.mice2, n_mig)
+            for mouse in migrants2:
+                self.mice2.remove(mouse)
+                self.mice1.append(mouse)
+                mouse.start_migration(CENTER1, 1)
+        # update genotypes after migration
+        update_genotypes(self.mice1, self.q1, CENTER1)
+        update_genotypes(self.mice2, self.q2, CENTER2)
+
+    def update(self, dt):
+        """Advance the game by dt milliseconds: step generations when due and move the mice."""
+        if not self.auto_run:
+            return
+        self.since_step_ms += dt
+        if self.since_step_ms >= self.step_delay_ms:
+            self.since_step_ms = 0.0
+            self.step_generation()
+        for mouse in self.mice1 + self.mice2:
+            mouse.move(CENTER1 if mouse.group==1 else CENTER2)
+
+    # ---------------- Drawing ----------------
+    def render(self, surface):
+        """Draw the current state onto a surface; does not change the simulation."""
+        surface.blit(self.background_img, (0, 0))
+
+        # Draw mice on top
+        for mouse in self.mice1 + self.mice2:
+            mouse.draw(surface, self.mouse_images)
+
+        # Draw Run and Reset buttons
+        pygame.draw.rect(surface, (135,169,107), self.run_button, border_radius=10)
+        pygame.draw.rect(surface, (135,169,107), self.reset_button, border_radius=10)
+        run_text = self.font.render("Run" if not self.auto_run else "Pause", True, (255,255,255))
+        surface.blit(run_text, run_text.get_rect(center=self.run_button.center))
+        reset_text = self.font.render("Reset", True, (255,255,255))
+        surface.blit(reset_text, reset_text.get_rect(center=self.reset_button.center))
+
+        for sl in self.sliders.values():
+            sl.draw(surface, self.font)
+
+        gen_text = self.font.render(f"Gen: {self.generation}   q1={self.q1:.3f}   q2={self.q2:.3f}",
+                                    True, (20,20,20))
+        surface.blit(gen_text, (SCREEN_W - gen_text.get_width() - 20, 20))
+
+        # Draw the plot
+        self.ax.set_xlim(0, max(100, self.generation))
+        self.line1.set_data(range(len(self.hist_q1)), self.hist_q1)
+        self.line2.set_data(range(len(self.hist_q2)), self.hist_q2)
+        self.canvas.draw()
+        raw = bytes(self.canvas.buffer_rgba())
+        plot = pygame.image.fromstring(raw, self.canvas.get_width_height(), "RGBA")
+        surface.blit(plot, (SCREEN_W - plot.get_width(), 60))
+
+    # ---------------- Main Loop ----------------
+    def run(self, max_frames=None, fps=60, max_generations=None, script=()):
+        """
+        Run the frame loop: input, update(dt), render, then wait for the clock.
+
+        Parameters:
+        - max_frames: stop after this many frames (None runs until the window is closed)
+        - fps: frame rate cap passed to the clock (0 for none)
+        - max_generations: stop once the simulation reaches this generation; a headless
+          run without max_frames also stops once it is paused (or has converged) and no
+          scripted step is left that could restart it
+        - script: steps {"frame": n, ...} played back with script_events at frame n
+
+        Returns:
+        - FrameTimes with the wall time of every frame and of its update and render phases
+        """
+        surface = self.screen if self.screen is not None else pygame.Surface((SCREEN_W, SCREEN_H))
+        pending = sorted(script, key=lambda step: step["frame"])
+        times = FrameTimes([], [], [])
+        frame = 0
+        dt = 0.0
+        while self.running and (max_frames is None or frame < max_frames):
+            if max_generations is not None and self.generation >= max_generations:
+                break
+            # Headless, only the script can press Run: stop rather than idle forever
+            if max_frames is None and self.headless and not self.auto_run and not pending:
+                break
+            frame_start = time.perf_counter()
+            while pending and pending[0]["frame"] <= frame:
+                for event in self.script_events(pending.pop(0)):
+                    self.handle_event(event)
+            for event in pygame.event.get():
+                self.handle_event(event)
+
+            update_start = time.perf_counter()
+            self.update(dt)
+            render_start = time.perf_counter()
+            self.render(surface)
+            render_end = time.perf_counter()
+            if self.screen is not None:
+                pygame.display.flip()
+
+            dt = self.clock.tick(fps)
+            times.update.append(render_start - update_start)
+            times.render.append(render_end - render_start)
+            times.frame.append(time.perf_counter() - frame_start)
+            frame += 1
+        return times
+
+
+class FrameTimes:
+    """Per-frame wall times in seconds, for the whole frame and its update and render phases."""
+    def __init__(self, frame, update, render):
+        self.frame, self.update, self.render = frame, update, render
+
+    def summary(self):
+        return {"frame": timing_summary(self.frame), "update": timing_summary(self.update),
+                "render": timing_summary(self.render)}
+
+
+def timing_summary(frame_times):
+    """Mean, median, 95th percentile and worst time in milliseconds, and the rate per second."""
+    ms = np.asarray(frame_times) * 1e3
+    return {"frames": len(ms), "mean_ms": float(ms.mean()), "median_ms": float(np.median(ms)),
+            "p95_ms": float(np.percentile(ms, 95)), "max_ms": float(ms.max()),
+            "fps": float(1e3 / ms.mean()) if ms.mean() > 0 else float("inf")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MouseMod gene drive simulator")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a display (SDL dummy driver); the simulation starts "
+                        "running unless a --script presses Run")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    parser.add_argument("--generations", type=int, default=None, help="stop at this generation")
+    parser.add_argument("--script", help="JSON file with scripted slider changes and clicks")
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap (0 for none)")
+    args = parser.parse_args()
+    if args.headless and args.frames is None and args.generations is None:
+        parser.error("--headless needs --frames or --generations")
+    script = ()
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    if (args.headless and args.generations is not None and script
+            and not any(step.get("click") == "run" for step in script)):
+        parser.error("--generations with a --script needs a {\"click\": \"run\"} step to start the simulation")
+
+    # Headless runs step one generation per frame on a fixed clock, without waiting
+    app = (MouseModApp(headless=True, clock=FixedClock(), step_delay_ms=0) if args.headless
+           else MouseModApp())
+    if args.headless and not script:
+        app.auto_run = True  # nobody can press Run, so start right away
+    times = app.run(args.frames, 0 if args.headless else args.fps, args.generations, script)
+    pygame.quit()
+    if args.headless and times.frame:
+        print(json.dumps(times.summary()))
+
+
+if __name__ == "__main__":
+    main()
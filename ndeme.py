@@ -0,0 +1,129 @@
+"""
+N-Deme Gene Drive Model
+
+Generalizes the two-deme recurrence to any number of demes. Migration is a
+row-stochastic matrix M: after migration, deme i holds sum_j M[i, j] * q[j], one
+matrix-vector product per generation. The selection and conversion phase is the
+kernel's select_gene_drive, applied to all demes at once, with s, c and h either
+shared or given per deme.
+
+migration_matrix() builds M from per-generation dispersal rates with the same
+normalization as the two-deme model, so two_deme_migration_matrix(m, alpha)
+reproduces the batch engine (step_with_coefficients) bit for bit.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from gene_drive import SelectionCoefficients, select_gene_drive, selection_coefficients
+
+
+class NDemeResult(NamedTuple):
+    """Final state of an N-deme run."""
+    q: np.ndarray  # (N,) drive allele frequency per deme
+    generations: int
+    converged: bool
+    history: Optional[np.ndarray]  # (generations + 1, N) when requested, starting at the initial state
+
+
+def migration_matrix(rates) -> np.ndarray:
+    """
+    Row-stochastic migration matrix from dispersal rates.
+
+    rates[i, j] (i != j) is the fraction of deme j that moves to deme i each
+    generation; the diagonal is ignored. Deme i keeps the part of its own
+    population that does not leave, receives the migrants, and is renormalized
+    by its new size, as in the two-deme model:
+
+        M[i, i] = (1 - sum_k rates[k, i]) / d_i,  M[i, j] = rates[i, j] / d_i,
+        d_i = 1 - sum_k rates[k, i] + sum_j rates[i, j]
+
+    Parameters:
+    - rates: (N, N) array of dispersal fractions
+
+    Returns:
+    - (N, N) row-stochastic matrix M
+    """
+    rates = np.array(rates, dtype=np.float64)
+    np.fill_diagonal(rates, 0.0)
+    stay = 1 - rates.sum(axis=0)
+    if np.any(stay < 0):
+        raise ValueError("dispersal rates out of a deme sum to more than 1")
+    size = stay + rates.sum(axis=1)
+    matrix = rates / size[:, None]
+    np.fill_diagonal(matrix, stay / size)
+    return matrix
+
+
+def two_deme_migration_matrix(m: float, alpha: float) -> np.ndarray:
+    """
+    The migration matrix of the two-deme model.
+
+    Deme 2 sends a fraction m to deme 1 and deme 1 sends alpha*m to deme 2. The
+    entries are computed exactly like gene_drive_coefficients, so N-deme runs with
+    this matrix match run_gene_drive_model_batch to the last bit (and the scalar
+    step_gene_drive, which groups its arithmetic differently, to ~1e-14).
+    """
+    d1 = 1 - alpha*m + m
+    d2 = 1 - m + alpha*m
+    return np.array([[(1 - alpha*m) / d1, m / d1],
+                     [alpha*m / d2, (1 - m) / d2]])
+
+
+def step_n_deme(q: np.ndarray, migration: np.ndarray, selection: SelectionCoefficients,
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Advance all demes by one generation: migration, then selection and conversion.
+
+    Parameters:
+    - q: (N,) current frequencies
+    - migration: (N, N) row-stochastic migration matrix
+    - selection: fitness constants, scalars or one per deme
+    - out: optional (N,) array for the result; may be q itself
+
+    Returns:
+    - (N,) frequencies in the next generation
+    """
+    # einsum rather than BLAS: its multiply-then-add matches the two-deme kernel bit
+    # for bit, where BLAS may fuse the two and round differently
+    p = np.einsum("ij,j->i", migration, q)
+    return select_gene_drive(p, *selection, out=out)
+
+
+def run_n_deme_model(s, c, h, migration, initial_q,
+                     max_generations: int = 10000,
+                     convergence_threshold: float = 1e-10,
+                     history: bool = False) -> NDemeResult:
+    """
+    Run the N-deme model until no deme moves by more than the convergence threshold.
+
+    Parameters:
+    - s, c, h: selection, conversion and dominance, scalars or (N,) arrays per deme
+    - migration: (N, N) row-stochastic migration matrix, e.g. from migration_matrix
+    - initial_q: (N,) initial drive allele frequencies
+    - max_generations: maximum number of generations to simulate
+    - convergence_threshold: threshold for determining convergence
+    - history: also return the frequencies of every generation
+
+    Returns:
+    - NDemeResult with the final frequencies
+    """
+    migration = np.asarray(migration, dtype=np.float64)
+    q = np.array(initial_q, dtype=np.float64)
+    if migration.shape != (q.size, q.size):
+        raise ValueError(f"migration matrix of shape {migration.shape} does not match {q.size} demes")
+    selection = selection_coefficients(s, c, h)
+    q_next = np.empty_like(q)
+    records = [q.copy()] if history else None
+
+    for generation in range(max_generations):
+        step_n_deme(q, migration, selection, out=q_next)
+        if records is not None:
+            records.append(q_next.copy())
+        done = np.max(np.abs(q_next - q)) < convergence_threshold
+        q, q_next = q_next, q
+        if done:
+            return NDemeResult(q, generation + 1, True, np.array(records) if history else None)
+
+    return NDemeResult(q, max_generations, False, np.array(records) if history else None)
@@ -0,0 +1,45 @@
+"""
+Plotting for the Gene Drive Model
+
+Matplotlib figures of simulated trajectories. Kept apart from simulation.py so
+that the model core imports without matplotlib.
+"""
+
+import matplotlib.pyplot as plt
+
+from simulation import run_gene_drive_model
+
+def plot_dynamics(s: float, c: float, h: float, m: float, alpha: float,
+                  initial_q1: float, initial_q2: float) -> None:
+    """Plot the dynamics of gene drive frequencies over time."""
+    _, _, q1_history, q2_history = run_gene_drive_model(s, c, h, m, alpha, initial_q1, initial_q2)
+    
+    plt.figure(figsize=(10, 6))
+    plt.plot(q1_history, label='Deme 1 (Target)')
+    plt.plot(q2_history, label='Deme 2 (Non-target)')
+    plt.xlabel('Generation')
+    plt.ylabel('Gene Drive Allele Frequency')
+    plt.title(f'Gene Drive Dynamics (s={s}, c={c}, h={h}, m={m}, α={alpha})')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+def plot_alpha_comparison(s: float, c: float, h: float, m: float, 
+                         initial_q1: float = 0.7, initial_q2: float = 0.001) -> None:
+    """Plot a comparison of different alpha values."""
+    alpha_values = [0.1, 0.5, 1.0, 2.0, 10.0]
+    
+    plt.figure(figsize=(12, 8))
+    
+    for alpha in alpha_values:
+        final_q1, final_q2, q1_history, q2_history = run_gene_drive_model(
+            s, c, h, m, alpha, initial_q1, initial_q2)
+        plt.plot(q1_history[:100], label=f'α={alpha}, Deme 1', linestyle='-')
+        plt.plot(q2_history[:100], label=f'α={alpha}, Deme 2', linestyle='--')
+    
+    plt.xlabel('Generation')
+    plt.ylabel('Gene Drive Allele Frequency')
+    plt.title(f'Effect of Asymmetric Migration (s={s}, c={c}, h={h}, m={m})')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
@@ -1,11 +1,66 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Tuple, List
+from typing import Tuple, List, NamedTuple, Optional, Union
+
+from acceleration import BatchTrajectoryAccelerator, TrajectoryAccelerator, check_method
+from gene_drive import (OUTCOME_DTE, classify_outcome, gene_drive_coefficients, step_gene_drive,
+                        step_with_coefficients)
+
+class HistoryBuffer:
+    """
+    Growable float64 record of (q1, q2) per recorded generation.
+    
+    Storage is preallocated and doubles when full, so recording a generation writes
+    two floats into an existing array instead of boxing them into list entries.
+    """
+    
+    def __init__(self, capacity: int = 256):
+        self._q1 = np.empty(capacity)
+        self._q2 = np.empty(capacity)
+        self._views = (memoryview(self._q1), memoryview(self._q2))
+        self._size = 0
+    
+    def append(self, q1: float, q2: float) -> None:
+        if self._size == self._q1.size:
+            self._grow()
+        self._views[0][self._size] = q1
+        self._views[1][self._size] = q2
+        self._size += 1
+    
+    def _grow(self) -> None:
+        capacity = 2 * self._q1.size
+        self._views[0].release()
+        self._views[1].release()
+        self._q1 = np.resize(self._q1, capacity)
+        self._q2 = np.resize(self._q2, capacity)
+        self._views = (memoryview(self._q1), memoryview(self._q2))
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The recorded q1 and q2 values, trimmed to length."""
+        return self._q1[:self._size], self._q2[:self._size]
+
+def _history_stride(history: Union[str, int, None]) -> int:
+    """Recording stride for a history mode: 0 for none, 1 for full, N for every Nth generation."""
+    if history is None or history == "none":
+        return 0
+    if history == "full":
+        return 1
+    if isinstance(history, int) and not isinstance(history, bool) and history >= 1:
+        return history
+    raise ValueError(f"history must be 'none', 'full' or a positive stride, not {history!r}")
 
 def run_gene_drive_model(s: float, c: float, h: float, m: float, alpha: float,
                          initial_q1: float, initial_q2: float, 
                          max_generations: int = 10000, 
-                         convergence_threshold: float = 1e-10) -> Tuple[float, float, List, List]:
+                         convergence_threshold: float = 1e-10,
+                         accelerate: Optional[str] = None,
+                         stats: Optional[dict] = None,
+                         history: Union[str, int, None] = "full"
+                         ) -> Tuple[float, float, Optional[np.ndarray], Optional[np.ndarray]]:
     """
     Simulate the two-deme gene drive model from Greenbaum et al. (2021) with asymmetric migration.
     
@@ -18,70 +73,206 @@ def run_gene_drive_model(s: float, c: float, h: float, m: float, alpha: float,
     - initial_q1, initial_q2: initial frequencies in deme 1 and deme 2
     - max_generations: maximum number of generations to simulate
     - convergence_threshold: threshold for determining convergence
+    - accelerate: None for plain iteration, or "aitken"/"anderson" to extrapolate once the
+      trajectory contracts linearly (see acceleration.py); the history then contains the
+      extrapolated points
+    - stats: optional dict that receives "generations", "converged", "residual" and, when
+      accelerating, "extrapolations" and the estimated "generations_saved"
+    - history: "full" to record every generation, None or "none" to record nothing, or an
+      int N to record generations 0, N, 2N, ...
     
     Returns:
-    - equilibrium frequencies in both demes and history of frequencies
+    - equilibrium frequencies in both demes and history of frequencies as float64 arrays
+      (None for both histories when history is "none")
     """
+    check_method(accelerate)
+    stride = _history_stride(history)
+    accelerator = (TrajectoryAccelerator(accelerate, gene_drive_coefficients(s, c, h, m, alpha),
+                                         convergence_threshold, max_generations)
+                   if accelerate else None)
     q1, q2 = initial_q1, initial_q2
-    q1_history = [q1]
-    q2_history = [q2]
+    buffer = HistoryBuffer(min(max_generations // stride + 1, 1024)) if stride else None
+    record = buffer.append if stride == 1 else None
+    if buffer is not None:
+        buffer.append(q1, q2)
+    converged = False
+    generations = max_generations
     
     for generation in range(max_generations):
-        # Migration phase with asymmetric rates
-        # From the paper: q̃₁ = [(1-αm)q₁ + mq₂] / (1-αm+m)
-        # and q̃₂ = [(1-m)q₂ + αmq₁] / (1-m+αm)
-        q1_post_migration = ((1 - alpha*m) * q1 + m * q2) / (1 - alpha*m + m)
-        q2_post_migration = ((1 - m) * q2 + alpha*m * q1) / (1 - m + alpha*m)
-        
-        # Calculate selection components
-        s_n = 0.5 * (1 - c) * (1 - h * s)  # non-converted heterozygotes
-        s_c = c * (1 - s)  # converted heterozygotes (conversion before selection)
-        
-        # Calculate mean fitness in each deme
-        mean_fitness_1 = (q1_post_migration**2 * (1-s) + 
-                          2 * q1_post_migration * (1-q1_post_migration) * (2*s_n+s_c) + 
-                          (1-q1_post_migration)**2)
-        
-        mean_fitness_2 = (q2_post_migration**2 * (1-s) + 
-                          2 * q2_post_migration * (1-q2_post_migration) * (2*s_n+s_c) + 
-                          (1-q2_post_migration)**2)
-        
-        # Selection phase (calculate frequencies for next generation)
-        q1_next = (q1_post_migration**2 * (1-s) + 
-                   2 * q1_post_migration * (1-q1_post_migration) * (s_n + s_c)) / mean_fitness_1
-        
-        q2_next = (q2_post_migration**2 * (1-s) + 
-                   2 * q2_post_migration * (1-q2_post_migration) * (s_n + s_c)) / mean_fitness_2
+        q1_next, q2_next = step_gene_drive(q1, q2, s, c, h, m, alpha)
         
         # Check for convergence
         if (abs(q1_next - q1) < convergence_threshold and 
             abs(q2_next - q2) < convergence_threshold):
             q1, q2 = q1_next, q2_next
-            q1_history.append(q1)
-            q2_history.append(q2)
+            converged = True
+            generations = generation + 1
+            if buffer is not None and generations % stride == 0:
+                buffer.append(q1, q2)
             break
         
+        if accelerator is not None:
+            q1_next, q2_next = accelerator.propose(generation, q1, q2, q1_next, q2_next)
+        
         q1, q2 = q1_next, q2_next
-        q1_history.append(q1)
-        q2_history.append(q2)
+        if record is not None:
+            record(q1, q2)
+        elif stride > 1 and (generation + 1) % stride == 0:
+            buffer.append(q1, q2)
     
+    if stats is not None:
+        # Residual of the returned point itself
+        f1, f2 = step_gene_drive(q1, q2, s, c, h, m, alpha)
+        stats.update(generations=generations, converged=converged,
+                     residual=max(abs(f1 - q1), abs(f2 - q2)))
+        if accelerator is not None:
+            stats.update(extrapolations=accelerator.extrapolations,
+                         generations_saved=accelerator.generations_saved(generations))
+    
+    if buffer is None:
+        return q1, q2, None, None
+    q1_history, q2_history = buffer.arrays()
     return q1, q2, q1_history, q2_history
 
+class BatchResult(NamedTuple):
+    """Final state of a batch of gene drive runs, one entry per parameter set."""
+    q1: np.ndarray
+    q2: np.ndarray
+    generations: np.ndarray
+    converged: np.ndarray
+    generations_saved: Optional[np.ndarray] = None  # only set when accelerating
+
+def run_gene_drive_model_batch(s, c, h, m, alpha, initial_q1, initial_q2,
+                               max_generations: int = 10000,
+                               convergence_threshold: float = 1e-10,
+                               accelerate: Optional[str] = None) -> BatchResult:
+    """
+    Vectorized version of run_gene_drive_model over arrays of parameter sets.
+    
+    All arguments broadcast against each other; every element of the broadcast
+    shape is an independent run. Runs that have converged are dropped from the
+    working set, so late generations only cost as much as the runs still moving.
+    
+    Parameters:
+    - s, c, h, m, alpha: model parameters (scalars or arrays), as in run_gene_drive_model
+    - initial_q1, initial_q2: initial frequencies (scalars or arrays)
+    - max_generations: maximum number of generations to simulate
+    - convergence_threshold: threshold for determining convergence
+    - accelerate: None, "aitken" or "anderson", as in run_gene_drive_model
+    
+    Returns:
+    - BatchResult with final q1, q2, the number of generations each run took
+      and whether it converged, all with the broadcast shape; when accelerating,
+      also the estimated generations saved per run
+    """
+    check_method(accelerate)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in
+                                   (s, c, h, m, alpha, initial_q1, initial_q2)))
+    shape = arrays[0].shape
+    s, c, h, m, alpha, q1, q2 = (a.ravel() for a in arrays)
+    coef = gene_drive_coefficients(s, c, h, m, alpha)
+    q1, q2 = q1.copy(), q2.copy()
+    
+    final_q1, final_q2 = q1.copy(), q2.copy()
+    generations = np.full(q1.shape, max_generations, dtype=np.int64)
+    converged = np.zeros(q1.shape, dtype=bool)
+    active = np.arange(q1.size)
+    accelerator = (BatchTrajectoryAccelerator(accelerate, coef, convergence_threshold,
+                                              max_generations)
+                   if accelerate else None)
+    
+    for generation in range(max_generations):
+        if active.size == 0:
+            break
+        q1_next, q2_next = step_with_coefficients(q1, q2, coef)
+        
+        done = ((np.abs(q1_next - q1) < convergence_threshold) &
+                (np.abs(q2_next - q2) < convergence_threshold))
+        any_done = done.any()
+        if any_done:
+            finished = active[done]
+            final_q1[finished] = q1_next[done]
+            final_q2[finished] = q2_next[done]
+            generations[finished] = generation + 1
+            converged[finished] = True
+        
+        if accelerator is not None:
+            q1_next, q2_next = accelerator.propose(generation, active, q1, q2, q1_next, q2_next)
+        q1, q2 = q1_next, q2_next
+        
+        if any_done:
+            # Compact the working set to the runs that are still moving
+            keep = ~done
+            active = active[keep]
+            q1, q2 = q1[keep], q2[keep]
+            coef = coef.compress(keep)
+            if accelerator is not None:
+                accelerator.compress(keep)
+    
+    final_q1[active] = q1
+    final_q2[active] = q2
+    
+    saved = (accelerator.generations_saved(generations).reshape(shape)
+             if accelerator is not None else None)
+    return BatchResult(final_q1.reshape(shape), final_q2.reshape(shape),
+                       generations.reshape(shape), converged.reshape(shape), saved)
+
+def _dte_chunk(s, c, h, alpha, m, initial_q1, initial_q2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run a chunk of parameter sets through the batch engine; module-level so pool workers can pickle it."""
+    result = run_gene_drive_model_batch(s, c, h, m, alpha, initial_q1, initial_q2)
+    return classify_outcome(result.q1, result.q2) == OUTCOME_DTE, result.q1, result.q2
+
 def find_critical_migration(s: float, c: float, h: float, alpha: float = 1.0, 
                            initial_q1: float = 0.7, initial_q2: float = 0.1,
-                           precision: float = 0.001) -> float:
+                           precision: float = 0.001, k: int = 1,
+                           workers: Optional[int] = None, warm_start: bool = False,
+                           executor: Optional[Executor] = None) -> float:
     """
     Find the critical migration threshold (m*) for a given gene drive configuration.
     This is an approximation - it finds the highest m where differential targeting occurs.
+    
+    With k > 1 the search is k-ary: each round evaluates k evenly spaced migration
+    rates inside the bracket at once and narrows it by a factor of k+1 instead of 2.
+    Every candidate is a run from (initial_q1, initial_q2), so for any k the search
+    answers the same question as bisection. The candidates go through the batch
+    engine, split across a process pool when workers > 1 or an executor is given.
+    A round costs k runs, so in-process the k-ary search does more work than
+    bisection; it only pays off when the runs of a round execute in parallel.
+    
+    warm_start asks a different question: whether the DTE branch still exists at m.
+    A bracketing run at m = 0 finds a DTE equilibrium, and every round starts its
+    runs from the DTE equilibrium at the bracket's lower end, so the search follows
+    the branch to the fold where it disappears (as continuation.find_fold does).
+    The fold can lie well above the m* of runs from the initial frequencies.
+    
+    Parameters:
+    - s, c, h, alpha: gene drive configuration and migration asymmetry
+    - initial_q1, initial_q2: initial frequencies in deme 1 and deme 2
+    - precision: width of the final bracket around m*
+    - k: number of migration rates evaluated per round (1 for plain bisection)
+    - workers: number of worker processes for the k-ary search (None or 1 runs in-process);
+      with an executor, the number of chunks each round is split into (default k)
+    - warm_start: track the DTE branch to its fold instead of running from the initial frequencies
+    - executor: pool to submit the k-ary rounds to instead of starting one per call,
+      e.g. when searching many configurations; it is left running
+    
+    Returns:
+    - the highest migration rate found to give differential targeting
     """
+    if k > 1 or warm_start:
+        return _find_critical_migration_kary(s, c, h, alpha, initial_q1, initial_q2,
+                                             precision, k, workers, warm_start, executor)
+    
     m_low, m_high = 0.0, 0.5
     
     while m_high - m_low > precision:
         m_mid = (m_low + m_high) / 2
-        final_q1, final_q2, _, _ = run_gene_drive_model(s, c, h, m_mid, alpha, initial_q1, initial_q2)
+        final_q1, final_q2, _, _ = run_gene_drive_model(s, c, h, m_mid, alpha, initial_q1, initial_q2,
+                                                         history=None)
         
-        # Check if we have differential targeting (DTE)
-        has_dte = (0 < final_q2 < final_q1 < 1)
+        # Check if we have differential targeting (DTE). Frequencies within 1e-6 of
+        # loss or fixation count as lost or fixed, since runs stop ~1e-10 short of them
+        has_dte = classify_outcome(final_q1, final_q2) == OUTCOME_DTE
         
         if has_dte:
             m_low = m_mid  # Try a higher migration rate
@@ -90,56 +281,151 @@ def find_critical_migration(s: float, c: float, h: float, alpha: float = 1.0,
     
     return m_low
 
+def _find_critical_migration_kary(s: float, c: float, h: float, alpha: float,
+                                  initial_q1: float, initial_q2: float, precision: float,
+                                  k: int, workers: Optional[int], warm_start: bool,
+                                  executor: Optional[Executor]) -> float:
+    """k-ary search behind find_critical_migration(k > 1 or warm_start)."""
+    m_low, m_high = 0.0, 0.5
+    start_q1, start_q2 = initial_q1, initial_q2
+    if warm_start:
+        # Bracketing pass: the branch is followed from the DTE equilibrium at m = 0
+        has_dte, final_q1, final_q2 = _dte_chunk(s, c, h, alpha, 0.0, initial_q1, initial_q2)
+        if not has_dte:
+            return 0.0
+        start_q1, start_q2 = float(final_q1), float(final_q2)
+    owned = executor is None and workers is not None and workers > 1
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    
+    try:
+        while m_high - m_low > precision:
+            candidates = m_low + (m_high - m_low) * np.arange(1, k + 1) / (k + 1)
+            q1_start = np.full(k, start_q1)
+            q2_start = np.full(k, start_q2)
+            
+            if executor is None:
+                has_dte, final_q1, final_q2 = _dte_chunk(s, c, h, alpha, candidates, q1_start, q2_start)
+            else:
+                chunks = np.array_split(np.arange(k), min(workers or k, k))
+                futures = [executor.submit(_dte_chunk, s, c, h, alpha, candidates[idx],
+                                           q1_start[idx], q2_start[idx]) for idx in chunks]
+                parts = [future.result() for future in futures]
+                has_dte, final_q1, final_q2 = (np.concatenate(part) for part in zip(*parts))
+            
+            # The first candidate without DTE closes the bracket from above
+            lost = np.flatnonzero(~has_dte)
+            first_lost = lost[0] if lost.size else k
+            if first_lost < k:
+                m_high = candidates[first_lost]
+            if first_lost > 0:
+                m_low = candidates[first_lost - 1]
+                if warm_start:
+                    start_q1, start_q2 = final_q1[first_lost - 1], final_q2[first_lost - 1]
+    finally:
+        if owned:
+            executor.shutdown()
+    
+    return float(m_low)
+
+class CriticalMigrationResult(NamedTuple):
+    """m* estimates for a batch of drive configurations, with per-element diagnostics."""
+    m_star: np.ndarray
+    valid: np.ndarray  # bracket held: DTE below m_star and none at the upper end
+    iterations: np.ndarray
+
+def find_critical_migration_batch(s, c, h, alpha=1.0,
+                                  initial_q1=0.7, initial_q2=0.1,
+                                  precision: float = 0.001,
+                                  m_max: float = 0.5) -> CriticalMigrationResult:
+    """
+    Vectorized find_critical_migration over arrays of drive configurations.
+    
+    All configurations are bisected in lockstep: each round runs one batch through
+    run_gene_drive_model_batch with every configuration at the midpoint of its own
+    bracket. The midpoints are those of find_critical_migration, so with the default
+    m_max the results match it, except where a run ends within rounding of a
+    classify_outcome threshold: the batch and scalar engines group their arithmetic
+    differently (~1e-14 apart). Configurations that still show DTE at m_max have
+    m* beyond the bracket; they are not bisected and report m_max.
+    
+    Parameters:
+    - s, c, h, alpha: drive configurations (scalars or arrays, broadcast together)
+    - initial_q1, initial_q2: initial frequencies (scalars or arrays)
+    - precision: width of the final bracket around m*
+    - m_max: upper end of the initial bracket [0, m_max]
+    
+    Returns:
+    - CriticalMigrationResult with m* per configuration (0 where DTE never occurred,
+      m_max where it persists at m_max), whether the bracket was valid, and how many
+      bisection rounds were run
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in
+                                   (s, c, h, alpha, initial_q1, initial_q2)))
+    shape = arrays[0].shape
+    s, c, h, alpha, initial_q1, initial_q2 = (a.ravel() for a in arrays)
+    
+    m_low = np.zeros(s.size)
+    m_high = np.full(s.size, m_max)
+    iterations = np.zeros(s.size, dtype=np.int64)
+    
+    # Configurations with DTE at the top of the bracket have m* beyond it
+    has_dte, _, _ = _dte_chunk(s, c, h, alpha, m_high, initial_q1, initial_q2)
+    m_low[has_dte] = m_max
+    active = np.flatnonzero(~has_dte)
+    
+    while active.size and m_high[active[0]] - m_low[active[0]] > precision:
+        m_mid = (m_low[active] + m_high[active]) / 2
+        has_dte, _, _ = _dte_chunk(s[active], c[active], h[active], alpha[active], m_mid,
+                                   initial_q1[active], initial_q2[active])
+        m_low[active] = np.where(has_dte, m_mid, m_low[active])
+        m_high[active] = np.where(has_dte, m_high[active], m_mid)
+        iterations[active] += 1
+    
+    valid = (m_high < m_max) & (m_low > 0)
+    return CriticalMigrationResult(m_low.reshape(shape), valid.reshape(shape),
+                                   iterations.reshape(shape))
+
 def test_parameter_set(s: float, c: float, h: float, m: float, alpha: float,
-                       initial_values: List[Tuple[float, float]]) -> None:
-    """Test a set of parameters with different initial conditions."""
+                       initial_values: List[Tuple[float, float]], store=None) -> None:
+    """
+    Test a set of parameters with different initial conditions.
+    
+    With a store (store.ResultStore), the runs are also appended to it as one batch.
+    """
     print(f"Parameters: s={s}, c={c}, h={h}, m={m}, alpha={alpha}")
     
     results = []
+    generations = []
     for i, (init_q1, init_q2) in enumerate(initial_values):
-        final_q1, final_q2, _, _ = run_gene_drive_model(s, c, h, m, alpha, init_q1, init_q2)
+        stats = {}
+        final_q1, final_q2, _, _ = run_gene_drive_model(s, c, h, m, alpha, init_q1, init_q2,
+                                                         history=None, stats=stats)
         results.append((init_q1, init_q2, final_q1, final_q2))
+        generations.append(stats["generations"])
         print(f"Initial: ({init_q1:.2f}, {init_q2:.2f}) → Final: ({final_q1:.6f}, {final_q2:.6f})")
     
+    if store is not None and results:
+        init_q1, init_q2, final_q1, final_q2 = (np.array(column) for column in zip(*results))
+        store.append({"s": s, "c": c, "h": h, "m": m, "alpha": alpha,
+                      "initial_q1": init_q1, "initial_q2": init_q2, "q1": final_q1, "q2": final_q2,
+                      "generations": np.array(generations),
+                      "outcome": classify_outcome(final_q1, final_q2)})
+    
     return results
 
-def plot_dynamics(s: float, c: float, h: float, m: float, alpha: float,
-                  initial_q1: float, initial_q2: float) -> None:
-    """Plot the dynamics of gene drive frequencies over time."""
-    _, _, q1_history, q2_history = run_gene_drive_model(s, c, h, m, alpha, initial_q1, initial_q2)
-    
-    plt.figure(figsize=(10, 6))
-    plt.plot(q1_history, label='Deme 1 (Target)')
-    plt.plot(q2_history, label='Deme 2 (Non-target)')
-    plt.xlabel('Generation')
-    plt.ylabel('Gene Drive Allele Frequency')
-    plt.title(f'Gene Drive Dynamics (s={s}, c={c}, h={h}, m={m}, α={alpha})')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-
-def plot_alpha_comparison(s: float, c: float, h: float, m: float, 
-                         initial_q1: float = 0.7, initial_q2: float = 0.001) -> None:
-    """Plot a comparison of different alpha values."""
-    alpha_values = [0.1, 0.5, 1.0, 2.0, 10.0]
-    
-    plt.figure(figsize=(12, 8))
-    
-    for alpha in alpha_values:
-        final_q1, final_q2, q1_history, q2_history = run_gene_drive_model(
-            s, c, h, m, alpha, initial_q1, initial_q2)
-        plt.plot(q1_history[:100], label=f'α={alpha}, Deme 1', linestyle='-')
-        plt.plot(q2_history[:100], label=f'α={alpha}, Deme 2', linestyle='--')
-    
-    plt.xlabel('Generation')
-    plt.ylabel('Gene Drive Allele Frequency')
-    plt.title(f'Effect of Asymmetric Migration (s={s}, c={c}, h={h}, m={m})')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+def __getattr__(name: str):
+    # Plotting lives in plotting.py so that the model, and every pool worker that
+    # imports it, does not load matplotlib; the old names still resolve on first use
+    if name in ("plot_dynamics", "plot_alpha_comparison"):
+        import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Example usage:
 if __name__ == "__main__":
+    from plotting import plot_alpha_comparison, plot_dynamics
+    
     # Example 1: B2 configuration from the paper (Fig. 2)
     s, c, h = 0.5, 0.6, 0.3
     
@@ -0,0 +1,141 @@
+"""
+Columnar Results Store
+
+Stores model results as typed columns: one raw little-endian binary file per
+column plus a meta.json with the column dtypes and the number of committed rows.
+Rows are appended in bulk batches; meta.json is rewritten atomically after the
+column files, so a crash mid-append leaves the store at its last committed size.
+meta.json also records, for each tagged source (e.g. a sweep's configuration
+hash), the row at which its rows begin, so an export can tell what the store holds.
+
+Readers memory-map the columns, so range filters over large stores only page in
+the columns they test. No dependencies beyond NumPy; export_npz() writes a
+single-file copy for sharing.
+"""
+
+import json
+import os
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Parameters, release frequencies, final frequencies, generation count and outcome code
+COLUMNS: Dict[str, str] = {
+    "s": "<f8", "c": "<f8", "h": "<f8", "m": "<f8", "alpha": "<f8",
+    "initial_q1": "<f8", "initial_q2": "<f8",
+    "q1": "<f8", "q2": "<f8",
+    "generations": "<i4",
+    "outcome": "u1",
+}
+
+
+class ResultStore:
+    """
+    Append-only column store in a directory.
+
+    Parameters:
+    - path: directory of the store; created with the default COLUMNS if missing
+    - columns: column names and dtypes for a new store (ignored when opening one)
+    """
+
+    def __init__(self, path: str, columns: Optional[Mapping[str, str]] = None):
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.columns = {name: np.dtype(dtype) for name, dtype in meta["columns"].items()}
+            self.rows = meta["rows"]
+            self.sources: Dict[str, int] = meta.get("sources", {})
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.columns = {name: np.dtype(dtype) for name, dtype in (columns or COLUMNS).items()}
+            self.rows = 0
+            self.sources = {}
+            self._write_meta()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _write_meta(self) -> None:
+        temporary = os.path.join(self.path, "meta.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump({"columns": {name: dtype.str for name, dtype in self.columns.items()},
+                       "rows": self.rows, "sources": self.sources}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, os.path.join(self.path, "meta.json"))
+
+    def append(self, batch, source: Optional[str] = None) -> None:
+        """
+        Append a batch of rows.
+
+        Parameters:
+        - batch: mapping from column name to array, or a structured array; every
+          column of the store must be present, and scalars are broadcast
+        - source: tag of the data the rows come from; its first append records the
+          starting row in sources, committed together with the rows
+        """
+        names = batch.dtype.names if isinstance(batch, np.ndarray) else batch.keys()
+        missing = set(self.columns) - set(names)
+        if missing:
+            raise ValueError(f"batch is missing columns {sorted(missing)}")
+        arrays = np.broadcast_arrays(*(np.asarray(batch[name]).ravel() for name in self.columns))
+        for (name, dtype), values in zip(self.columns.items(), arrays):
+            path = self._column_path(name)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # Drop whatever an interrupted append left beyond the committed rows
+                f.truncate(self.rows * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        if source is not None and source not in self.sources:
+            self.sources[source] = self.rows
+        self.rows += arrays[0].size
+        self._write_meta()
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory map of one column (an empty array for an empty store)."""
+        dtype = self.columns[name]
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(self.rows,))
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def select(self, chunk_size: int = 1 << 20, **ranges: Tuple[float, float]) -> np.ndarray:
+        """
+        Row indices whose columns all lie within the given closed ranges.
+
+        Parameters:
+        - chunk_size: rows tested at a time, bounding temporary memory
+        - ranges: column=(low, high) conditions, e.g. m=(0.05, 0.1)
+
+        Returns:
+        - sorted int64 array of matching row indices
+        """
+        for name in ranges:
+            if name not in self.columns:
+                raise KeyError(f"unknown column {name!r}")
+        columns = {name: self.column(name) for name in ranges}
+        hits = []
+        for start in range(0, self.rows, chunk_size):
+            stop = min(start + chunk_size, self.rows)
+            keep = np.ones(stop - start, dtype=bool)
+            for name, (low, high) in ranges.items():
+                values = columns[name][start:stop]
+                keep &= (values >= low) & (values <= high)
+            hits.append(start + np.flatnonzero(keep))
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.int64)
+
+    def read(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Load every column, or only the given rows, into memory."""
+        return {name: np.array(self.column(name) if rows is None else self.column(name)[rows])
+                for name in self.columns}
+
+    def export_npz(self, path: str, rows: Optional[np.ndarray] = None) -> None:
+        """Write the store, or the given rows, as one compressed .npz file."""
+        np.savez_compressed(path, **self.read(rows))
@@ -0,0 +1,344 @@
+"""
+Phase-Diagram Sweeps
+
+Evaluates the model on the Cartesian grid of given s, c, h, m and alpha values,
+up to ~10^8 points, and records the equilibrium every point runs into from one
+release (initial_q1, initial_q2).
+
+The grid is split into chunks of consecutive flat indices. Each chunk runs through
+the batch engine, in-process or on a ProcessPoolExecutor, and its worker writes the
+results straight into a preallocated .npy file opened as a memory map; only the
+number of points done travels back to the parent.
+
+Completed chunks are journaled next to the output, so a preempted sweep resumes
+where it stopped when it is started again with the same configuration, and a
+finished one is not recomputed.
+
+adaptive_sweep() resolves outcome boundaries instead: it starts from a coarse grid
+over the swept axes and only subdivides cells (quadtree in 2-d, octree in 3-d, and
+so on) whose corners disagree on the outcome.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from gene_drive import classify_outcome
+from simulation import run_gene_drive_model_batch
+
+PARAMETERS = ("s", "c", "h", "m", "alpha")
+
+# One record per grid point; packed, so a 10^8 point sweep takes 2.1 GB on disk
+RESULT_DTYPE = np.dtype([("q1", "<f8"), ("q2", "<f8"), ("generations", "<i4"), ("outcome", "u1")])
+
+
+class SweepGrid(NamedTuple):
+    """Axis values of a sweep; the grid is their Cartesian product in this order."""
+    s: np.ndarray
+    c: np.ndarray
+    h: np.ndarray
+    m: np.ndarray
+    alpha: np.ndarray
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(axis) for axis in self)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def points(self, start: int, stop: int) -> Tuple[np.ndarray, ...]:
+        """Parameter values (s, c, h, m, alpha) of the grid points with flat indices in [start, stop)."""
+        index = np.unravel_index(np.arange(start, stop), self.shape)
+        return tuple(axis[i] for axis, i in zip(self, index))
+
+
+class SweepResult(NamedTuple):
+    """Sweep output: a structured array of RESULT_DTYPE with the grid's shape."""
+    results: np.ndarray  # memmap of the output file
+    grid: SweepGrid
+    seconds: float
+    points_per_second: float  # over the points computed by this call
+    resumed_points: int = 0  # points already done by an earlier, interrupted call
+    config: str = ""  # hash of the sweep configuration, identifying this output
+
+
+class ChunkJournal:
+    """
+    Completed chunk indices of a sweep, kept in a JSON file that is replaced atomically.
+
+    The journal is tied to a configuration hash; a journal written for a different
+    configuration is ignored and overwritten.
+    """
+
+    def __init__(self, path: str, config: str):
+        self.path = path
+        self.config = config
+        self.done: Set[int] = set()
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("config") == config:
+            self.done = set(state["done"])
+
+    def reset(self) -> None:
+        """Forget every completed chunk."""
+        self.done = set()
+        self._write()
+
+    def mark(self, chunks: Iterable[int]) -> None:
+        """Record chunks as completed; their results must already be on disk."""
+        self.done.update(chunks)
+        self._write()
+
+    def _write(self) -> None:
+        # Write a temporary file and rename it over the journal, so a crash leaves
+        # either the old or the new journal and never a partial one
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"config": self.config, "done": sorted(self.done)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+
+def _config_hash(grid: "SweepGrid", chunk_size: int, settings: Tuple) -> str:
+    """Hash of everything that determines a sweep's output."""
+    digest = hashlib.sha256()
+    for axis in grid:
+        digest.update(np.ascontiguousarray(axis, dtype="<f8").tobytes())
+        digest.update(b"|")
+    digest.update(repr((chunk_size, settings, RESULT_DTYPE.descr)).encode())
+    return digest.hexdigest()
+
+
+def make_grid(s, c, h, m, alpha) -> SweepGrid:
+    """Build a SweepGrid from scalars or 1-d sequences of parameter values."""
+    return SweepGrid(*(np.atleast_1d(np.asarray(v, dtype=np.float64)).ravel() for v in (s, c, h, m, alpha)))
+
+
+def evaluate_points(s, c, h, m, alpha, initial_q1: float, initial_q2: float,
+                    max_generations: int = 10000,
+                    convergence_threshold: float = 1e-10,
+                    accelerate: Optional[str] = None) -> np.ndarray:
+    """
+    Run parameter sets through the batch engine and pack the results as RESULT_DTYPE records.
+
+    Parameters:
+    - s, c, h, m, alpha: arrays of parameter sets, broadcast against each other
+    - initial_q1, initial_q2: release frequencies shared by all runs
+    - max_generations, convergence_threshold, accelerate: as in run_gene_drive_model_batch
+
+    Returns:
+    - structured array with final frequencies, generations and OUTCOME_* codes
+    """
+    result = run_gene_drive_model_batch(s, c, h, m, alpha, initial_q1, initial_q2,
+                                        max_generations, convergence_threshold, accelerate)
+    records = np.empty(result.q1.shape, dtype=RESULT_DTYPE)
+    records["q1"] = result.q1
+    records["q2"] = result.q2
+    records["generations"] = result.generations
+    records["outcome"] = classify_outcome(result.q1, result.q2)
+    return records
+
+
+def _sweep_chunk(path: str, grid: SweepGrid, start: int, stop: int, initial_q1: float,
+                 initial_q2: float, max_generations: int, convergence_threshold: float,
+                 accelerate: Optional[str]) -> int:
+    """Evaluate one chunk and write it into the output file; module-level so pool workers can pickle it."""
+    records = evaluate_points(*grid.points(start, stop), initial_q1, initial_q2,
+                              max_generations, convergence_threshold, accelerate)
+    results = np.load(path, mmap_mode="r+")
+    results.reshape(-1)[start:stop] = records
+    results.flush()
+    del results
+    return stop - start
+
+
+def print_progress(done: int, total: int, elapsed: float) -> None:
+    """Default progress reporter: one overwritten line on stderr."""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    end = "\n" if done == total else ""
+    print(f"\r{done}/{total} points ({100 * done / total:.1f}%), {rate:,.0f} points/s",
+          end=end, file=sys.stderr, flush=True)
+
+
+def sweep(s, c, h, m, alpha, out: str,
+          initial_q1: float = 0.7, initial_q2: float = 0.1,
+          chunk_size: int = 1 << 16,
+          workers: Optional[int] = None,
+          max_generations: int = 10000,
+          convergence_threshold: float = 1e-10,
+          accelerate: Optional[str] = None,
+          progress: Optional[Callable[[int, int, float], None]] = print_progress,
+          resume: bool = True) -> SweepResult:
+    """
+    Sweep the Cartesian grid of parameter values and record the outcome of every point.
+
+    Parameters:
+    - s, c, h, m, alpha: scalars or 1-d sequences of values for each parameter
+    - out: .npy path of the output; it holds a RESULT_DTYPE array of shape
+      (len(s), len(c), len(h), len(m), len(alpha)) and can be memory-mapped
+      back with np.load(out, mmap_mode="r")
+    - initial_q1, initial_q2: release frequencies in deme 1 and deme 2
+    - chunk_size: grid points per chunk
+    - workers: number of worker processes (None or 1 runs in-process)
+    - max_generations, convergence_threshold, accelerate: as in run_gene_drive_model_batch
+    - progress: called as progress(done, total, elapsed_seconds) after every chunk, or None
+    - resume: pick up the chunks journaled in out + ".journal" by an earlier call
+      with the same configuration; a finished sweep is then not recomputed
+
+    Returns:
+    - SweepResult with the memory-mapped results and the sweep's throughput
+    """
+    grid = make_grid(s, c, h, m, alpha)
+    total = grid.size
+    chunks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    settings = (initial_q1, initial_q2, max_generations, convergence_threshold, accelerate)
+
+    config = _config_hash(grid, chunk_size, settings)
+    journal = ChunkJournal(f"{out}.journal", config)
+    if not (resume and journal.done and os.path.exists(out)):
+        journal.reset()
+        np.lib.format.open_memmap(out, mode="w+", dtype=RESULT_DTYPE, shape=grid.shape).flush()
+    pending = [k for k in range(len(chunks)) if k not in journal.done]
+    resumed = total - sum(chunks[k][1] - chunks[k][0] for k in pending)
+
+    started = time.perf_counter()
+    done = resumed
+    if pending and workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_sweep_chunk, out, grid, *chunks[k], *settings): k for k in pending}
+            for future in as_completed(futures):
+                done += future.result()
+                journal.mark([futures[future]])
+                if progress is not None:
+                    progress(done, total, time.perf_counter() - started)
+    else:
+        for k in pending:
+            done += _sweep_chunk(out, grid, *chunks[k], *settings)
+            journal.mark([k])
+            if progress is not None:
+                progress(done, total, time.perf_counter() - started)
+
+    seconds = time.perf_counter() - started
+    computed = total - resumed
+    return SweepResult(np.load(out, mmap_mode="r"), grid, seconds,
+                       computed / seconds if seconds > 0 else 0.0, resumed, config)
+
+
+class AdaptiveSweepResult(NamedTuple):
+    """
+    Points evaluated by adaptive_sweep, on the lattice of its finest level.
+
+    index[k] holds the lattice coordinates of records[k] along the swept axes;
+    leaves lists the final cells as (origin coordinates..., size), with sizes in
+    lattice steps.
+    """
+    axes: Tuple[str, ...]  # names of the swept parameters
+    lattice: Tuple[np.ndarray, ...]  # finest-level values along each swept axis
+    index: np.ndarray  # (n, len(axes)) lattice coordinates
+    records: np.ndarray  # RESULT_DTYPE record of each evaluated point
+    leaves: np.ndarray  # (n_leaves, len(axes) + 1) final cells
+
+    @property
+    def full_grid_points(self) -> int:
+        """Evaluations a uniform grid at the finest resolution would need."""
+        return int(np.prod([len(values) for values in self.lattice]))
+
+    def outcome_grid(self) -> np.ndarray:
+        """
+        Rasterize the outcomes onto the full finest lattice.
+
+        Cells whose corners agree are filled with their corners' outcome; every
+        evaluated point keeps its own. Only practical when the full lattice fits
+        in memory.
+        """
+        grid = np.empty(tuple(len(values) for values in self.lattice), dtype=np.uint8)
+        outcome_at = dict(zip(map(tuple, self.index), self.records["outcome"]))
+        for *origin, size in self.leaves[np.argsort(-self.leaves[:, -1], kind="stable")]:
+            grid[tuple(slice(o, o + size + 1) for o in origin)] = outcome_at[tuple(origin)]
+        grid[tuple(self.index.T)] = self.records["outcome"]
+        return grid
+
+
+def adaptive_sweep(s, c, h, m, alpha,
+                   resolution: int = 9, depth: int = 6,
+                   initial_q1: float = 0.7, initial_q2: float = 0.1,
+                   max_generations: int = 10000,
+                   convergence_threshold: float = 1e-10,
+                   accelerate: Optional[str] = None) -> AdaptiveSweepResult:
+    """
+    Map outcome regions by refining only the cells whose corners disagree on the outcome.
+
+    Each parameter is either a fixed scalar or a (low, high) pair to sweep. The
+    swept axes start on a uniform grid of resolution points; every level evaluates
+    the corners of the current cells in one batch (outcomes as in
+    find_critical_migration, via classify_outcome) and splits the cells whose
+    corners are not all the same outcome into 2^d children. Features smaller than
+    a coarse cell that do not touch any of its corners are not seen.
+
+    Parameters:
+    - s, c, h, m, alpha: fixed value or (low, high) range of each parameter
+    - resolution: points per swept axis on the coarse grid (at least 2)
+    - depth: number of refinement levels; the finest lattice has
+      (resolution - 1) * 2**depth + 1 points per swept axis
+    - initial_q1, initial_q2: release frequencies in deme 1 and deme 2
+    - max_generations, convergence_threshold, accelerate: as in run_gene_drive_model_batch
+
+    Returns:
+    - AdaptiveSweepResult with every evaluated point and the final cells
+    """
+    values = dict(zip(PARAMETERS, (s, c, h, m, alpha)))
+    axes = tuple(name for name in PARAMETERS if np.ndim(values[name]) == 1)
+    if not axes:
+        raise ValueError("adaptive_sweep needs at least one (low, high) parameter range")
+    d = len(axes)
+    cells_per_axis = (resolution - 1) * 2 ** depth
+    lattice = tuple(np.linspace(*values[name], cells_per_axis + 1) for name in axes)
+    shape = (cells_per_axis + 1,) * d
+    offsets = np.array(list(itertools.product((0, 1), repeat=d)), dtype=np.int64)
+
+    size = 2 ** depth
+    coarse = np.arange(0, cells_per_axis, size)
+    cells = np.stack(np.meshgrid(*[coarse] * d, indexing="ij"), axis=-1).reshape(-1, d)
+    keys = np.empty(0, dtype=np.int64)  # flat lattice index of every evaluated point, sorted
+    records = np.empty(0, dtype=RESULT_DTYPE)
+    leaves: List[np.ndarray] = []
+
+    while True:
+        corners = (cells[:, None, :] + size * offsets[None, :, :]).reshape(-1, d)
+        corner_keys = np.ravel_multi_index(tuple(corners.T), shape)
+        new = np.setdiff1d(corner_keys, keys)
+        if new.size:
+            coords = np.unravel_index(new, shape)
+            params = [lattice[axes.index(name)][coords[axes.index(name)]] if name in axes
+                      else values[name] for name in PARAMETERS]
+            new_records = evaluate_points(*params, initial_q1, initial_q2,
+                                          max_generations, convergence_threshold, accelerate)
+            keys = np.concatenate([keys, new])
+            records = np.concatenate([records, new_records])
+            order = np.argsort(keys, kind="stable")
+            keys, records = keys[order], records[order]
+
+        outcomes = records["outcome"][np.searchsorted(keys, corner_keys)].reshape(len(cells), -1)
+        mixed = (outcomes != outcomes[:, :1]).any(axis=1)
+        final = ~mixed if size > 1 else np.ones(len(cells), dtype=bool)
+        leaves.append(np.column_stack([cells[final], np.full(final.sum(), size)]))
+        if size == 1 or not mixed.any():
+            break
+        size //= 2
+        cells = (cells[mixed][:, None, :] + size * offsets[None, :, :]).reshape(-1, d)
+
+    index = np.column_stack(np.unravel_index(keys, shape))
+    return AdaptiveSweepResult(axes, lattice, index, records, np.concatenate(leaves))